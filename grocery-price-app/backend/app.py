@@ -14,6 +14,12 @@ load_dotenv()
 from routes.auth_routes import auth_bp
 from routes.product_routes import product_bp
 from routes.predict_routes import predict_bp
+from routes.scraper_routes import scraper_bp
+from scrapers.executor import init_scraper_executor
+from refresh_worker import init_refresh_worker
+from harvest import init_harvest
+from search_history import init_search_history
+from suggest_index import init_suggest_index
 
 
 def create_app():
@@ -43,10 +49,18 @@ def create_app():
     # Initialize database
     db.init_app(app)
     
+    # Shared scraper pool (one per process, reused by every search)
+    app.config['SCRAPER_MAX_WORKERS'] = int(os.getenv('SCRAPER_MAX_WORKERS', 16))
+    app.config['SCRAPER_QUEUE_DEPTH'] = int(os.getenv('SCRAPER_QUEUE_DEPTH', 64))
+    app.config['SCRAPER_STORE_CONCURRENCY'] = int(os.getenv('SCRAPER_STORE_CONCURRENCY', 6))
+    app.config['SCRAPER_DEADLINE_SECONDS'] = float(os.getenv('SCRAPER_DEADLINE_SECONDS', 15))
+    init_scraper_executor(app)
+    
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(product_bp)
     app.register_blueprint(predict_bp)
+    app.register_blueprint(scraper_bp)
     
     # Create database tables and handle schema updates
     with app.app_context():
@@ -83,6 +97,10 @@ def create_app():
                         conn.commit()
                 except Exception as e:
                     print(f"Index creation note: {str(e)}")
+                
+                # Trigram product-name index for /search name resolution (FTS5 / pg_trgm)
+                from product_index import ensure_product_index
+                ensure_product_index(db.engine)
 
                 # Categories table + products.category_id column
                 try:
@@ -115,6 +133,41 @@ def create_app():
                             conn.commit()
                     except Exception as e:
                         print(f"Price schema migration note: {str(e)}")
+
+                # Daily price key (scraped_on) for upserts: backfill, drop same-day duplicates, enforce uniqueness
+                if 'scraped_on' not in price_columns:
+                    try:
+                        with db.engine.connect() as conn:
+                            conn.execute(text('ALTER TABLE prices ADD COLUMN scraped_on DATE'))
+                            conn.execute(text('UPDATE prices SET scraped_on = DATE(scraped_at) WHERE scraped_on IS NULL'))
+                            # Keep the newest scraped_at per day, ties broken by the highest id
+                            conn.execute(text(
+                                'DELETE FROM prices WHERE id NOT IN ('
+                                'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+                                'PARTITION BY product_id, store_name, scraped_on '
+                                'ORDER BY CASE WHEN scraped_at IS NULL THEN 1 ELSE 0 END, scraped_at DESC, id DESC'
+                                ') AS position FROM prices) ranked WHERE position = 1)'
+                            ))
+                            conn.execute(text(
+                                'CREATE UNIQUE INDEX IF NOT EXISTS uq_prices_product_store_day '
+                                'ON prices (product_id, store_name, scraped_on)'
+                            ))
+                            conn.commit()
+                    except Exception as e:
+                        print(f"Price schema migration note: {str(e)}")
+
+                # Fill a newly created current_prices table from the price history
+                try:
+                    with db.engine.connect() as conn:
+                        empty = conn.execute(text('SELECT 1 FROM current_prices LIMIT 1')).first() is None
+                        has_prices = conn.execute(text('SELECT 1 FROM prices LIMIT 1')).first() is not None
+                    if empty and has_prices:
+                        from price_store import rebuild_current_prices
+                        print(f"Built current_prices: {rebuild_current_prices()} rows")
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Current prices migration note: {str(e)}")
             except OperationalError:
                 # Table doesn't exist yet, will be created by create_all
                 pass
@@ -122,6 +175,18 @@ def create_app():
         except Exception as e:
             print(f"Database initialization note: {str(e)}")
     
+    # Store every product card of scraped pages, not just the first (SCRAPER_HARVEST_ENABLED)
+    init_harvest(app)
+    
+    # Batch SearchHistory inserts outside the search transaction (SEARCH_HISTORY_WRITE_BEHIND)
+    init_search_history(app)
+    
+    # In-memory autocomplete for /products/suggest (SUGGEST_INDEX_ENABLED)
+    init_suggest_index(app)
+    
+    # Background refresh of popular products (SCRAPER_REFRESH_ENABLED=True)
+    init_refresh_worker(app)
+    
     # Health check endpoint (no auth required)
     @app.route('/health', methods=['GET'])
     def health():
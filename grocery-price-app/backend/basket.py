@@ -0,0 +1,116 @@
+"""
+Whole-basket price comparison across stores.
+"""
+from typing import Dict, List
+
+
+# Items accepted by one basket search
+BASKET_MAX_ITEMS = 50
+
+
+def parse_basket(data) -> List[Dict]:
+    """
+    Validate a basket request body.
+
+    Expected JSON:
+    {
+        "items": [{"product_name": "milk", "quantity": 2}, {"product_name": "bread"}]
+    }
+
+    Returns:
+        [{'product_name', 'quantity'}], same-name items merged (quantities added)
+
+    Raises:
+        ValueError: With a message for the client if the basket is invalid
+    """
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        raise ValueError('Items are required')
+    if len(data['items']) > BASKET_MAX_ITEMS:
+        raise ValueError(f'A basket can have at most {BASKET_MAX_ITEMS} items')
+
+    items = {}
+    for item in data['items']:
+        if not isinstance(item, dict):
+            raise ValueError('Each item must be an object with a product_name')
+        product_name = str(item.get('product_name') or '').strip()
+        if not product_name:
+            raise ValueError('Product name cannot be empty')
+        try:
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid quantity for {product_name}')
+        if quantity < 1:
+            raise ValueError(f'Quantity for {product_name} must be at least 1')
+
+        key = product_name.lower()
+        if key in items:
+            items[key]['quantity'] += quantity
+        else:
+            items[key] = {'product_name': product_name, 'quantity': quantity}
+    return list(items.values())
+
+
+def _available(prices: List[Dict]) -> Dict[str, Dict]:
+    """In-stock price per store for one item."""
+    return {price['store']: price for price in prices if price.get('in_stock', True)}
+
+
+def compare_basket(items: List[Dict]) -> Dict:
+    """
+    Price a basket at every store and find the cheapest split.
+
+    Args:
+        items: [{'product_name', 'quantity', 'prices'}] with each item's price dictionaries
+
+    Returns:
+        Dictionary with:
+        - stores: per-store total, available and missing items, lowest complete basket first
+        - cheapest_store: store with the lowest total among stores that have every item (or None)
+        - cheapest_split: each item bought at its cheapest store, grouped by store, with the total
+    """
+    available = [_available(item['prices']) for item in items]
+    store_names = sorted({store for prices in available for store in prices})
+
+    stores = []
+    for store in store_names:
+        total, missing = 0.0, []
+        for item, prices in zip(items, available):
+            if store in prices:
+                total += prices[store]['price'] * item['quantity']
+            else:
+                missing.append(item['product_name'])
+        stores.append({
+            'store': store,
+            'total': round(total, 2),
+            'items_available': len(items) - len(missing),
+            'missing': missing,
+            'complete': not missing
+        })
+    stores.sort(key=lambda store: (not store['complete'], -store['items_available'], store['total']))
+
+    split, split_total, unavailable = {}, 0.0, []
+    for item, prices in zip(items, available):
+        if not prices:
+            unavailable.append(item['product_name'])
+            continue
+        best = min(prices.values(), key=lambda price: price['price'])
+        subtotal = round(best['price'] * item['quantity'], 2)
+        split.setdefault(best['store'], []).append({
+            'product_name': item['product_name'],
+            'quantity': item['quantity'],
+            'price': best['price'],
+            'subtotal': subtotal,
+            'link': best.get('link')
+        })
+        split_total += subtotal
+
+    complete = [store for store in stores if store['complete']]
+    return {
+        'stores': stores,
+        'cheapest_store': complete[0]['store'] if complete else None,
+        'cheapest_split': {
+            'total': round(split_total, 2),
+            'stores': split,
+            'unavailable': unavailable
+        }
+    }
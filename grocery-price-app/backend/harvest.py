@@ -0,0 +1,132 @@
+"""
+Catalog harvesting from scraped search pages.
+Every priced card on a fetched page is queued and bulk-upserted as Product/Price
+rows by a background writer, so one store request warms many products.
+"""
+import os
+import time
+import atexit
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from models import db
+from price_store import save_harvested_prices
+from scrapers.price_scraper import set_harvest_sink
+
+
+# Off by default: harvesting parses up to SCRAPER_HARVEST_MAX_CARDS cards per live store fetch
+# instead of stopping at the first, on the search's own request path
+HARVEST_ENABLED = os.getenv('SCRAPER_HARVEST_ENABLED', 'False').lower() == 'true'
+# Cards waiting to be written; pages are dropped (and counted) when full
+HARVEST_QUEUE_SIZE = int(os.getenv('SCRAPER_HARVEST_QUEUE_SIZE', 20000))
+# Cards per database transaction
+HARVEST_BATCH_SIZE = int(os.getenv('SCRAPER_HARVEST_BATCH_SIZE', 500))
+# Max seconds a card waits before its batch is written
+HARVEST_FLUSH_SECONDS = float(os.getenv('SCRAPER_HARVEST_FLUSH_SECONDS', 2.0))
+
+
+class HarvestWriter:
+    """Queues harvested cards from the scrapers and writes them in batches."""
+
+    def __init__(self, app, batch_size: int = HARVEST_BATCH_SIZE,
+                 flush_seconds: float = HARVEST_FLUSH_SECONDS, queue_size: int = HARVEST_QUEUE_SIZE):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'pages': 0, 'cards': 0, 'dropped_pages': 0, 'batches': 0,
+                       'products_created': 0, 'prices_written': 0, 'errors': 0}
+
+    def _count(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def submit(self, cards: List[Dict]):
+        """Queue one page of cards without blocking (the scraper loop calls this)."""
+        try:
+            self._queue.put_nowait(cards)
+            self._count(pages=1, cards=len(cards))
+        except queue.Full:
+            self._count(dropped_pages=1)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='catalog-harvester', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_batch(self) -> List[Dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.extend(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, cards: List[Dict]):
+        """Write one batch of cards in a single transaction."""
+        with self.app.app_context():
+            try:
+                created, written = save_harvested_prices(cards)
+                db.session.commit()
+                self._count(batches=1, products_created=created, prices_written=written)
+            except Exception as e:
+                db.session.rollback()
+                self._count(errors=1)
+                print(f"Error saving harvested products: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self.flush(batch)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued_pages'] = self._queue.qsize()
+        return stats
+
+
+_writer: Optional[HarvestWriter] = None
+
+
+def get_harvest_stats() -> Dict:
+    """Harvest counters, or {'enabled': False} when harvesting is off."""
+    if _writer is None:
+        return {'enabled': False}
+    return dict(_writer.stats(), enabled=True)
+
+
+def init_harvest(app) -> Optional[HarvestWriter]:
+    """
+    Start harvesting every card of scraped pages if SCRAPER_HARVEST_ENABLED (default off).
+    Stored in app.extensions['catalog_harvester'].
+    """
+    global _writer
+    if not HARVEST_ENABLED:
+        return None
+    if _writer is None:
+        _writer = HarvestWriter(app)
+        _writer.start()
+        set_harvest_sink(_writer.submit)
+        atexit.register(_writer.stop, 5)
+    app.extensions['catalog_harvester'] = _writer
+    return _writer
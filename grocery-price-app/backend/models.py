@@ -79,20 +79,47 @@ class Product(db.Model):
     
     # Relationships
     prices = db.relationship('Price', backref='product', lazy=True, cascade='all, delete-orphan')
+    current_prices = db.relationship('CurrentPrice', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert product to dictionary."""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'category': (self.category_obj.name if self.category_obj else self.category),
-            'category_id': self.category_id,
-            'image_url': self.image_url,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'prices': [price.to_dict() for price in self.prices]
-        }
+    def to_dict(self, prices=None, fields=None):
+        """
+        Convert product to dictionary.
+        
+        Args:
+            prices: Price or CurrentPrice rows to include (default: the newest
+                price per store, never the whole history)
+            fields: Keys to include (default all)
+        """
+        def wanted(field):
+            return fields is None or field in fields
+        
+        data = {}
+        if wanted('id'):
+            data['id'] = self.id
+        if wanted('name'):
+            data['name'] = self.name
+        if wanted('description'):
+            data['description'] = self.description
+        if wanted('category'):
+            data['category'] = self.category_obj.name if self.category_obj else self.category
+        if wanted('category_id'):
+            data['category_id'] = self.category_id
+        if wanted('image_url'):
+            data['image_url'] = self.image_url
+        if wanted('created_at'):
+            data['created_at'] = self.created_at.isoformat()
+        if wanted('updated_at'):
+            data['updated_at'] = self.updated_at.isoformat()
+        if wanted('prices'):
+            rows = self.current_prices if prices is None else prices
+            data['prices'] = [price.to_dict() for price in rows]
+        return data
+
+
+def _scraped_on(context):
+    """Default scraped_on to the day of the row's scraped_at."""
+    scraped_at = context.get_current_parameters().get('scraped_at')
+    return (scraped_at or datetime.utcnow()).date()
 
 
 class Price(db.Model):
@@ -107,11 +134,14 @@ class Price(db.Model):
     product_url = db.Column(db.String(500))
     in_stock = db.Column(db.Boolean, default=True)
     scraped_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # UTC day of scraped_at: the daily key that price upserts conflict on
+    scraped_on = db.Column(db.Date, default=_scraped_on)
     
     # Unique constraint to prevent duplicate prices for same product+store per day
     __table_args__ = (
         db.Index('idx_product_store_time', 'product_id', 'store_name', 'scraped_at'),
         db.Index('idx_product_store', 'product_id', 'store_name'),
+        db.Index('uq_prices_product_store_day', 'product_id', 'store_name', 'scraped_on', unique=True),
     )
     
     def to_dict(self):
@@ -130,6 +160,33 @@ class Price(db.Model):
         }
 
 
+class CurrentPrice(db.Model):
+    """Newest price per product and store, written with every Price upsert (see price_store)."""
+    __tablename__ = 'current_prices'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    store_name = db.Column(db.String(100), primary_key=True)
+    price = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(10), default='INR')
+    product_url = db.Column(db.String(500))
+    in_stock = db.Column(db.Boolean, default=True)
+    scraped_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        """Convert current price to dictionary."""
+        return {
+            'product_id': self.product_id,
+            'store_name': self.store_name,
+            'price': self.price,
+            'currency': self.currency,
+            'link': self.product_url,  # Backward compatibility
+            'product_url': self.product_url,
+            'in_stock': self.in_stock,
+            'recorded_at': self.scraped_at.isoformat(),  # Backward compatibility
+            'scraped_at': self.scraped_at.isoformat()
+        }
+
+
 class SearchHistory(db.Model):
     """Search history model to track user searches."""
     __tablename__ = 'search_history'
@@ -0,0 +1,319 @@
+"""
+Price persistence shared by the search routes and the background scrapers.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func
+
+from models import db, Product, Price, CurrentPrice
+from utils import normalize_product_name
+
+
+# Stored prices younger than this are served by /search without scraping (0 disables)
+PRICE_FRESH_SECONDS = float(os.getenv('PRICE_FRESH_SECONDS', 600))
+
+# Bound parameters per IN (...) query (SQLite allows 999 by default)
+IN_CHUNK_SIZE = 500
+
+# Rows per INSERT ... ON CONFLICT statement (8 bound parameters each)
+UPSERT_CHUNK_SIZE = 100
+
+# Columns a price upsert overwrites on the day's existing row
+UPSERT_COLUMNS = ('price', 'currency', 'product_url', 'in_stock', 'scraped_at')
+
+# Columns of current_prices (one row per product and store)
+CURRENT_COLUMNS = ('product_id', 'store_name') + UPSERT_COLUMNS
+
+
+def _chunks(items: List, size: int = IN_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_or_create_product(product_name: str) -> Product:
+    """
+    Get the product with this normalized name, creating it (flushed, not committed) if missing.
+    """
+    normalized_name = normalize_product_name(product_name)
+    product = Product.query.filter_by(normalized_name=normalized_name).first()
+    if not product:
+        product = Product(
+            name=product_name,
+            normalized_name=normalized_name,
+            description=f"Price comparison for {product_name}",
+            category="Grocery"
+        )
+        db.session.add(product)
+        db.session.flush()  # Get product.id without committing
+    return product
+
+
+def _price_row(product_id: int, price_info: Dict, scraped_at: datetime) -> Dict:
+    """Column values of a Price row for one scraped price dictionary."""
+    return {
+        'product_id': product_id,
+        'store_name': price_info['store'],
+        'price': round(float(price_info['price']), 2),
+        'currency': price_info.get('currency', 'INR'),
+        'product_url': price_info.get('link') or price_info.get('product_url', ''),
+        'in_stock': price_info.get('in_stock', True),
+        'scraped_at': scraped_at,
+        'scraped_on': scraped_at.date(),
+    }
+
+
+def _upsert_prices(rows: List[Dict]):
+    """
+    Write Price rows keyed on (product_id, store_name, scraped_on), and move
+    current_prices forward to any row newer than the one it holds.
+    On SQLite and PostgreSQL each table gets one INSERT ... ON CONFLICT DO UPDATE
+    per chunk, so concurrent writers cannot create duplicate daily rows. Other
+    databases load the existing rows in one query and update them in place.
+    Rows must be unique per key.
+    """
+    if not rows:
+        return
+    
+    current = {}
+    for row in rows:
+        key = (row['product_id'], row['store_name'])
+        if key not in current or row['scraped_at'] > current[key]['scraped_at']:
+            current[key] = {column: row[column] for column in CURRENT_COLUMNS}
+    current = list(current.values())
+    
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        insert = None
+    
+    if insert is not None:
+        for chunk in _chunks(rows, UPSERT_CHUNK_SIZE):
+            statement = insert(Price.__table__).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=['product_id', 'store_name', 'scraped_on'],
+                set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+            )
+            db.session.execute(statement)
+        for chunk in _chunks(current, UPSERT_CHUNK_SIZE):
+            statement = insert(CurrentPrice.__table__).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=['product_id', 'store_name'],
+                set_={column: statement.excluded[column] for column in UPSERT_COLUMNS},
+                where=statement.excluded.scraped_at >= CurrentPrice.__table__.c.scraped_at
+            )
+            db.session.execute(statement)
+        return
+    
+    days = sorted({row['scraped_on'] for row in rows})
+    product_ids = sorted({row['product_id'] for row in rows})
+    existing, existing_current = {}, {}
+    for chunk in _chunks(product_ids):
+        for price in Price.query.filter(Price.product_id.in_(chunk), Price.scraped_on.in_(days)).all():
+            existing[(price.product_id, price.store_name, price.scraped_on)] = price
+        for price in CurrentPrice.query.filter(CurrentPrice.product_id.in_(chunk)).all():
+            existing_current[(price.product_id, price.store_name)] = price
+    
+    for row in rows:
+        price = existing.get((row['product_id'], row['store_name'], row['scraped_on']))
+        if price is None:
+            db.session.add(Price(**row))
+        else:
+            for column in UPSERT_COLUMNS:
+                setattr(price, column, row[column])
+    
+    for row in current:
+        price = existing_current.get((row['product_id'], row['store_name']))
+        if price is None:
+            db.session.add(CurrentPrice(**row))
+        elif row['scraped_at'] >= price.scraped_at:
+            for column in UPSERT_COLUMNS:
+                setattr(price, column, row[column])
+
+
+def rebuild_current_prices() -> int:
+    """
+    Regenerate current_prices from the price history: the newest row per
+    (product_id, store_name), ties broken by the highest id.
+    Adds to the current session; the caller commits.
+    
+    Returns:
+        Number of current prices written
+    """
+    newest = db.session.query(
+        Price.product_id,
+        Price.store_name,
+        func.max(Price.scraped_at).label('scraped_at')
+    ).group_by(Price.product_id, Price.store_name).subquery()
+    newest_ids = db.session.query(func.max(Price.id)).join(newest, and_(
+        Price.product_id == newest.c.product_id,
+        Price.store_name == newest.c.store_name,
+        Price.scraped_at == newest.c.scraped_at
+    )).group_by(Price.product_id, Price.store_name)
+    
+    source = db.select(*[getattr(Price, column) for column in CURRENT_COLUMNS]).where(Price.id.in_(newest_ids))
+    db.session.execute(CurrentPrice.__table__.delete())
+    db.session.execute(CurrentPrice.__table__.insert().from_select(list(CURRENT_COLUMNS), source))
+    return db.session.query(func.count()).select_from(CurrentPrice).scalar()
+
+
+def save_prices(product_id: int, prices_data: List[Dict], scraped_at: Optional[datetime] = None) -> int:
+    """
+    Upsert scraped prices for a product: one row per store per day, written
+    with a single bulk statement. Adds to the current session; the caller commits.
+    
+    Args:
+        product_id: ID of the product the prices belong to
+        prices_data: Price dictionaries (store, price, currency, link, in_stock)
+        scraped_at: Observation time (defaults to now)
+    
+    Returns:
+        Number of store prices written
+    """
+    return save_product_prices({product_id: prices_data}, scraped_at)
+
+
+def save_product_prices(prices_by_product: Dict[int, List[Dict]], scraped_at: Optional[datetime] = None) -> int:
+    """
+    Upsert scraped prices for several products in one bulk write (see save_prices).
+    
+    Returns:
+        Number of store prices written
+    """
+    current_time = scraped_at or datetime.utcnow()
+    
+    rows = {}
+    for product_id, prices_data in prices_by_product.items():
+        for price_info in prices_data:
+            # Prices read back from the database are not new observations
+            if price_info.get('cached'):
+                continue
+            # First price per store wins (results are sorted lowest first)
+            key = (product_id, price_info['store'])
+            if key not in rows:
+                rows[key] = _price_row(product_id, price_info, current_time)
+    
+    _upsert_prices(list(rows.values()))
+    return len(rows)
+
+
+def save_harvested_prices(cards: List[Dict], scraped_at: Optional[datetime] = None) -> Tuple[int, int]:
+    """
+    Bulk-upsert harvested product cards as Product and Price rows.
+    Names are matched on normalize_product_name; missing products are created.
+    Uses a fixed number of queries per 500 names instead of one per card.
+    Adds to the current session; the caller commits.
+    
+    Args:
+        cards: Price dictionaries with a 'name' key (cards without a name are skipped)
+        scraped_at: Observation time (defaults to now)
+    
+    Returns:
+        (products created, store prices written)
+    """
+    current_time = scraped_at or datetime.utcnow()
+    
+    # First spelling seen wins as the display name
+    names, named_cards = {}, []
+    for card in cards:
+        normalized = normalize_product_name(card.get('name') or '')[:200]
+        if normalized:
+            names.setdefault(normalized, card['name'].strip()[:200])
+            named_cards.append((normalized, card))
+    if not names:
+        return 0, 0
+    
+    products = {}
+    for chunk in _chunks(list(names)):
+        for product in Product.query.filter(Product.normalized_name.in_(chunk)).order_by(Product.id).all():
+            products.setdefault(product.normalized_name, product)
+    
+    created = [
+        Product(
+            name=names[normalized],
+            normalized_name=normalized,
+            description=f"Price comparison for {names[normalized]}",
+            category="Grocery"
+        )
+        for normalized in names if normalized not in products
+    ]
+    if created:
+        db.session.add_all(created)
+        db.session.flush()  # Assign product ids
+        for product in created:
+            products[product.normalized_name] = product
+    
+    # One price per product and store (first card wins, like search results)
+    rows = {}
+    for normalized, card in named_cards:
+        rows.setdefault((products[normalized].id, card['store']), card)
+    
+    _upsert_prices([_price_row(product_id, card, current_time) for (product_id, _), card in rows.items()])
+    
+    return len(created), len(rows)
+
+
+def _cached_price(row) -> Dict:
+    """A stored Price or CurrentPrice row in the scraper format, marked as cached."""
+    return {
+        'store': row.store_name,
+        'price': float(row.price),
+        'currency': row.currency or 'INR',
+        'link': row.product_url,
+        'product_url': row.product_url,
+        'in_stock': row.in_stock,
+        'scraped_at': row.scraped_at.isoformat(),
+        'cached': True
+    }
+
+
+def recent_prices(product_id: int, max_age_seconds: Optional[float] = PRICE_FRESH_SECONDS,
+                  stores: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Latest stored price per store for a product, if scraped within max_age_seconds.
+    
+    Args:
+        product_id: ID of the product
+        max_age_seconds: Maximum age of the prices (None for any age)
+        stores: Only these stores (default all)
+    
+    Returns:
+        List of price dictionaries in the scraper format (empty if none are recent)
+    """
+    return latest_prices([product_id], max_age_seconds, stores).get(product_id, [])
+
+
+def latest_prices(product_ids: List[int], max_age_seconds: Optional[float] = None,
+                  stores: Optional[List[str]] = None) -> Dict[int, List[Dict]]:
+    """
+    Newest stored price per (product, store) for many products, read from
+    current_prices (one row per store, however long the history), one query
+    per 500 products.
+    
+    Args:
+        product_ids: IDs of the products
+        max_age_seconds: Only prices scraped within this many seconds (None for any age)
+        stores: Only these stores (default all)
+    
+    Returns:
+        {product_id: price dictionaries in the scraper format}; products without
+        matching prices are left out
+    """
+    if max_age_seconds is not None and max_age_seconds <= 0:
+        return {}
+    
+    store_prices = {}
+    for chunk in _chunks(sorted(set(product_ids))):
+        query = CurrentPrice.query.filter(CurrentPrice.product_id.in_(chunk))
+        if max_age_seconds is not None:
+            query = query.filter(CurrentPrice.scraped_at >= datetime.utcnow() - timedelta(seconds=max_age_seconds))
+        if stores is not None:
+            query = query.filter(CurrentPrice.store_name.in_(stores))
+        for row in query.all():
+            store_prices.setdefault(row.product_id, []).append(_cached_price(row))
+    
+    return store_prices
@@ -0,0 +1,182 @@
+"""
+Product-name index for resolving searches to catalog products.
+SQLite uses an FTS5 table with the trigram tokenizer, kept in sync with
+products by triggers; PostgreSQL uses a pg_trgm GIN index. Substring matches
+are ranked by relevance (prefix matches first, then bm25 / trigram similarity,
+then the shorter name) instead of by creation time. Without either index,
+resolution falls back to LIKE queries.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from models import db, Product
+
+
+FTS5 = 'fts5'
+PG_TRGM = 'pg_trgm'
+
+# Trigram indexes cannot answer queries shorter than one trigram
+MIN_INDEXED_LENGTH = 3
+
+_SQLITE_SETUP = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "normalized_name, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, normalized_name) VALUES (new.id, new.normalized_name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, normalized_name) "
+    "VALUES ('delete', old.id, old.normalized_name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF normalized_name ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, normalized_name) "
+    "VALUES ('delete', old.id, old.normalized_name); "
+    "INSERT INTO products_fts(rowid, normalized_name) VALUES (new.id, new.normalized_name); END",
+]
+
+_POSTGRES_SETUP = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS idx_products_normalized_name_trgm '
+    'ON products USING gin (normalized_name gin_trgm_ops)',
+]
+
+_SQLITE_MATCH = text(
+    "SELECT products.id FROM products_fts JOIN products ON products.id = products_fts.rowid "
+    "WHERE products_fts MATCH :match "
+    "ORDER BY (products.normalized_name LIKE :prefix ESCAPE '\\') DESC, products_fts.rank, "
+    "length(products.normalized_name), products.id LIMIT :limit"
+)
+
+_POSTGRES_MATCH = text(
+    "SELECT id FROM products WHERE normalized_name LIKE :contains ESCAPE '\\' "
+    "ORDER BY (normalized_name LIKE :prefix ESCAPE '\\') DESC, similarity(normalized_name, :name) DESC, "
+    "length(normalized_name), id LIMIT :limit"
+)
+
+# Index backend per database URL (None = LIKE fallback)
+_backends = {}
+
+
+def _like_escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def ensure_product_index(engine) -> Optional[str]:
+    """
+    Create the product-name index for the engine's database if it is missing.
+    A new SQLite index is filled from the existing products.
+
+    Returns:
+        FTS5, PG_TRGM, or None if the database cannot provide one
+    """
+    backend = None
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == 'sqlite':
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+                )).first()
+                for statement in _SQLITE_SETUP:
+                    conn.execute(text(statement))
+                if not exists:
+                    conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+                backend = FTS5
+            elif engine.dialect.name == 'postgresql':
+                for statement in _POSTGRES_SETUP:
+                    conn.execute(text(statement))
+                backend = PG_TRGM
+            conn.commit()
+    except Exception as e:
+        # e.g. SQLite older than 3.34 (no trigram tokenizer) or no rights to create extensions
+        backend = None
+        print(f"Product index note: {str(e)}")
+    _backends[str(engine.url)] = backend
+    return backend
+
+
+def product_index_backend(engine) -> Optional[str]:
+    """The engine's product-name index, created on first use if needed."""
+    key = str(engine.url)
+    if key not in _backends:
+        ensure_product_index(engine)
+    return _backends[key]
+
+
+def match_product_ids(conn, normalized_name: str, limit: int = 1,
+                      backend: Optional[str] = None) -> List[int]:
+    """
+    IDs of products whose normalized name contains normalized_name, best match first.
+
+    Args:
+        conn: Connection or session to query
+        normalized_name: Normalized search text
+        limit: Maximum number of IDs
+        backend: FTS5, PG_TRGM, or None for the unindexed LIKE queries
+    """
+    if not normalized_name:
+        return []
+
+    escaped = _like_escape(normalized_name)
+    params = {'prefix': f'{escaped}%', 'limit': limit}
+    if len(normalized_name) >= MIN_INDEXED_LENGTH:
+        if backend == FTS5:
+            params['match'] = '"' + normalized_name.replace('"', '""') + '"'
+            return [row[0] for row in conn.execute(_SQLITE_MATCH, params)]
+        if backend == PG_TRGM:
+            params.update(contains=f'%{escaped}%', name=normalized_name)
+            return [row[0] for row in conn.execute(_POSTGRES_MATCH, params)]
+    return match_product_ids_like(conn, normalized_name, limit)
+
+
+def match_product_ids_like(conn, normalized_name: str, limit: int = 1) -> List[int]:
+    """Unindexed resolution: prefix matches, then substring matches, oldest first."""
+    escaped = _like_escape(normalized_name)
+    ids = []
+    for pattern in (f'{escaped}%', f'%{escaped}%'):
+        rows = conn.execute(text(
+            "SELECT id FROM products WHERE normalized_name LIKE :pattern ESCAPE '\\' "
+            "ORDER BY created_at, id LIMIT :limit"
+        ), {'pattern': pattern, 'limit': limit})
+        ids.extend(row[0] for row in rows if row[0] not in ids)
+        if len(ids) >= limit:
+            break
+    return ids[:limit]
+
+
+def resolve_product(normalized_name: str) -> Optional[Product]:
+    """
+    Find the catalog product for a search: exact normalized match, otherwise
+    the best indexed substring match. Must be called inside an app context.
+    """
+    product = Product.query.filter_by(normalized_name=normalized_name).first()
+    if product:
+        return product
+
+    backend = product_index_backend(db.engine)
+    ids = match_product_ids(db.session, normalized_name, backend=backend)
+    return db.session.get(Product, ids[0]) if ids else None
+
+
+def resolve_products(normalized_names: List[str]) -> Dict[str, Optional[Product]]:
+    """
+    Resolve several searches at once (see resolve_product): one query for all
+    exact matches, one index lookup per remaining name and one query to load them.
+    """
+    names = list(dict.fromkeys(name for name in normalized_names if name))
+    products = dict.fromkeys(names)
+    for product in Product.query.filter(Product.normalized_name.in_(names)).order_by(Product.id).all():
+        if products[product.normalized_name] is None:
+            products[product.normalized_name] = product
+
+    backend = product_index_backend(db.engine)
+    matched = {}
+    for name in names:
+        if products[name] is None:
+            ids = match_product_ids(db.session, name, backend=backend)
+            if ids:
+                matched[name] = ids[0]
+    if matched:
+        loaded = {product.id: product
+                  for product in Product.query.filter(Product.id.in_(set(matched.values()))).all()}
+        for name, product_id in matched.items():
+            products[name] = loaded.get(product_id)
+    return products
@@ -0,0 +1,173 @@
+"""
+Bounded product payloads for the API.
+Products are loaded with their category in one query and their prices in one
+batched query: the newest price per store by default, or a capped window of
+price history. Callers may ask for a subset of the fields, and can revalidate
+a payload with a weak ETag computed from a single cheap query.
+"""
+import os
+import math
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Product, Price, CurrentPrice
+
+
+PRODUCT_FIELDS = ('id', 'name', 'description', 'category', 'category_id', 'image_url',
+                  'created_at', 'updated_at', 'prices')
+
+# Days of price history in product payloads (0 = newest price per store only)
+PRODUCT_HISTORY_DAYS = float(os.getenv('PRODUCT_HISTORY_DAYS', 0))
+# Most price rows per product when history is included, newest first
+PRODUCT_HISTORY_MAX_ROWS = int(os.getenv('PRODUCT_HISTORY_MAX_ROWS', 100))
+# Longest history window a client may ask for, in days
+PRODUCT_HISTORY_MAX_DAYS = float(os.getenv('PRODUCT_HISTORY_MAX_DAYS', 365))
+
+# Seconds a client may reuse a product response before revalidating it
+PRODUCT_CACHE_MAX_AGE = int(os.getenv('PRODUCT_CACHE_MAX_AGE', 30))
+
+# Bound parameters per IN (...) query (SQLite allows 999 by default)
+IN_CHUNK_SIZE = 500
+
+
+def parse_fields(value: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parse a sparse field selection like "id,name,prices".
+
+    Returns:
+        Set of field names, or None for all fields
+
+    Raises:
+        ValueError: If a field is unknown
+    """
+    if not value:
+        return None
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = fields.difference(PRODUCT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def parse_history_days(value: Optional[str]) -> float:
+    """
+    Parse a history_days parameter.
+
+    Returns:
+        Days of price history (PRODUCT_HISTORY_DAYS if not given)
+
+    Raises:
+        ValueError: If it is not a number greater than 0 and at most PRODUCT_HISTORY_MAX_DAYS
+    """
+    if value is None or not value.strip():
+        return PRODUCT_HISTORY_DAYS
+    try:
+        days = float(value)
+    except ValueError:
+        raise ValueError('history_days must be a number')
+    if not math.isfinite(days) or not 0 < days <= PRODUCT_HISTORY_MAX_DAYS:
+        raise ValueError(f'history_days must be greater than 0 and at most {PRODUCT_HISTORY_MAX_DAYS:g}')
+    return days
+
+
+def _price_history(product_ids: List[int], history_days: float,
+                   max_rows: int) -> Dict[int, List[Price]]:
+    """
+    Prices scraped within history_days per product, newest first, at most max_rows each.
+    The cap is applied in SQL, so no more than max_rows rows per product are loaded.
+    """
+    since = datetime.utcnow() - timedelta(days=history_days)
+    history = {product_id: [] for product_id in product_ids}
+    for start in range(0, len(product_ids), IN_CHUNK_SIZE):
+        chunk = product_ids[start:start + IN_CHUNK_SIZE]
+        ranked = db.session.query(
+            Price.id,
+            func.row_number().over(
+                partition_by=Price.product_id,
+                order_by=(Price.scraped_at.desc(), Price.id.desc())
+            ).label('position')
+        ).filter(
+            Price.product_id.in_(chunk),
+            Price.scraped_at >= since
+        ).subquery()
+        rows = Price.query.join(ranked, Price.id == ranked.c.id).filter(
+            ranked.c.position <= max_rows
+        ).order_by(Price.scraped_at.desc(), Price.id.desc()).all()
+        for row in rows:
+            history[row.product_id].append(row)
+    return history
+
+
+def product_payloads(product_ids: Iterable[int], fields: Optional[Set[str]] = None,
+                     history_days: float = PRODUCT_HISTORY_DAYS,
+                     max_rows: int = PRODUCT_HISTORY_MAX_ROWS) -> Dict[int, Dict]:
+    """
+    Serialize products with a fixed number of queries, however many there are.
+    Must be called inside an app context.
+
+    Args:
+        product_ids: IDs of the products
+        fields: Keys to include (default all, see parse_fields)
+        history_days: 0 for the newest price per store, otherwise every price
+            scraped in this many days (at most max_rows per product)
+        max_rows: Cap on price rows per product when history is included
+
+    Returns:
+        {product_id: product dictionary}; unknown IDs are left out
+    """
+    product_ids = sorted(set(product_ids))
+    with_prices = fields is None or 'prices' in fields
+
+    options = []
+    if fields is None or 'category' in fields:
+        options.append(joinedload(Product.category_obj))
+    if with_prices and history_days <= 0:
+        options.append(selectinload(Product.current_prices))
+
+    products = []
+    for start in range(0, len(product_ids), IN_CHUNK_SIZE):
+        chunk = product_ids[start:start + IN_CHUNK_SIZE]
+        products.extend(Product.query.options(*options).filter(Product.id.in_(chunk)).all())
+
+    history = {}
+    if with_prices and history_days > 0:
+        history = _price_history([product.id for product in products], history_days, max_rows)
+
+    return {product.id: product.to_dict(prices=history.get(product.id), fields=fields) for product in products}
+
+
+def product_payload(product_id: int, fields: Optional[Set[str]] = None,
+                    history_days: float = PRODUCT_HISTORY_DAYS) -> Optional[Dict]:
+    """One product's payload (see product_payloads), or None if it does not exist."""
+    return product_payloads([product_id], fields, history_days).get(product_id)
+
+
+def product_etag(product_id: int, fields: Optional[Set[str]] = None,
+                 history_days: float = PRODUCT_HISTORY_DAYS) -> Optional[str]:
+    """
+    Weak validator for a product payload from one cheap query: Product.updated_at
+    and the newest current_prices.scraped_at, plus the requested representation.
+    History windows also include the current hour, so rows ageing out of the
+    window are picked up within an hour.
+
+    Returns:
+        ETag value (without W/ and quotes), or None if the product does not exist
+    """
+    newest_price = db.session.query(func.max(CurrentPrice.scraped_at)).filter(
+        CurrentPrice.product_id == product_id
+    ).scalar_subquery()
+    row = db.session.query(Product.updated_at, newest_price).filter(Product.id == product_id).first()
+    if row is None:
+        return None
+
+    updated_at, scraped_at = row
+    parts = [str(product_id), updated_at.isoformat() if updated_at else '',
+             scraped_at.isoformat() if scraped_at else '',
+             ','.join(sorted(fields)) if fields is not None else '*', repr(history_days)]
+    if history_days > 0:
+        parts.append(datetime.utcnow().strftime('%Y%m%d%H'))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
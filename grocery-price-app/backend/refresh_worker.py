@@ -0,0 +1,194 @@
+"""
+Background price refresher for popular products.
+Ranks products by recent SearchHistory volume and re-scrapes the top ones on a
+schedule, so most searches can be answered from fresh database prices.
+"""
+import os
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from models import db, SearchHistory
+from price_store import save_prices, latest_prices
+from product_index import resolve_products
+from scrapers.price_scraper import fetch_prices
+from scrapers.registry import enabled_store_names
+from utils import normalize_product_name
+
+
+# Run the refresher inside the API process
+REFRESH_ENABLED = os.getenv('SCRAPER_REFRESH_ENABLED', 'False').lower() == 'true'
+# Seconds between refresh cycles
+REFRESH_INTERVAL = float(os.getenv('SCRAPER_REFRESH_INTERVAL', 900))
+# Products considered per cycle, most searched first
+REFRESH_TOP_N = int(os.getenv('SCRAPER_REFRESH_TOP_N', 50))
+# How far back searches are counted
+REFRESH_LOOKBACK_HOURS = float(os.getenv('SCRAPER_REFRESH_LOOKBACK_HOURS', 24))
+# Store requests allowed per cycle (each product costs one request per enabled store)
+REFRESH_REQUEST_BUDGET = int(os.getenv('SCRAPER_REFRESH_REQUEST_BUDGET', 200))
+# Stores whose newest price for a product is younger than this are not refreshed
+REFRESH_MIN_AGE = float(os.getenv('SCRAPER_REFRESH_MIN_AGE', 300))
+# Minimum seconds between two refresh requests to the same store
+REFRESH_STORE_INTERVAL = float(os.getenv('SCRAPER_REFRESH_STORE_INTERVAL', 2.0))
+# Random extra delay, as a fraction of the interval
+REFRESH_JITTER = float(os.getenv('SCRAPER_REFRESH_JITTER', 0.5))
+
+
+def popular_products(limit: int = REFRESH_TOP_N,
+                     lookback_hours: float = REFRESH_LOOKBACK_HOURS) -> List[Dict]:
+    """
+    Rank searched products by search volume in the lookback window.
+    Must be called inside an app context.
+
+    Args:
+        limit: Maximum number of products to return
+        lookback_hours: Only searches newer than this are counted
+
+    Returns:
+        List of {'product': Product, 'searches': count}, most searched first
+    """
+    since = datetime.utcnow() - timedelta(hours=lookback_hours)
+    rows = db.session.query(
+        SearchHistory.query,
+        func.count(SearchHistory.id)
+    ).filter(
+        SearchHistory.searched_at >= since
+    ).group_by(SearchHistory.query).all()
+
+    # Different spellings of the same query count together
+    counts = {}
+    for query, count in rows:
+        normalized = normalize_product_name(query)
+        if normalized:
+            counts[normalized] = counts.get(normalized, 0) + count
+
+    # Resolve names the way /search does (one IN query, index lookups for the rest);
+    # queries that resolve to the same product count together too
+    popular = {}
+    for normalized, product in resolve_products(list(counts)).items():
+        if product is not None:
+            entry = popular.setdefault(product.id, {'product': product, 'searches': 0})
+            entry['searches'] += counts[normalized]
+
+    ranked = sorted(popular.values(), key=lambda entry: (-entry['searches'], entry['product'].id))
+    return ranked[:limit]
+
+
+def _stale_stores(product_id: int, stores: List[str]) -> List[str]:
+    """Stores without a price for the product newer than REFRESH_MIN_AGE."""
+    fresh_stores = {price['store'] for price in latest_prices([product_id], REFRESH_MIN_AGE).get(product_id, [])}
+    return [store for store in stores if store not in fresh_stores]
+
+
+def run_refresh_cycle(top_n: int = REFRESH_TOP_N, request_budget: int = REFRESH_REQUEST_BUDGET,
+                      store_interval: float = REFRESH_STORE_INTERVAL,
+                      stop_event: Optional[threading.Event] = None) -> Dict:
+    """
+    Re-scrape the most searched products once, within the request budget.
+    Must be called inside an app context.
+
+    Products are refreshed one at a time (their stale stores in parallel),
+    spaced by store_interval plus jitter so no store sees more than one
+    refresh request per interval. Stores with a price newer than
+    REFRESH_MIN_AGE are not scraped again.
+
+    Returns:
+        Cycle summary (products refreshed/skipped, prices saved, store requests, seconds)
+    """
+    start = time.monotonic()
+    stores = enabled_store_names()
+    summary = {'refreshed': 0, 'skipped_fresh': 0, 'prices_saved': 0, 'store_requests': 0, 'errors': 0}
+
+    next_request_at = 0.0
+
+    for entry in popular_products(limit=top_n):
+        if stop_event is not None and stop_event.is_set():
+            break
+
+        product = entry['product']
+        # A fresh price from one store (e.g. harvested by a search) says nothing about the others
+        stale = _stale_stores(product.id, stores)
+        if not stale:
+            summary['skipped_fresh'] += 1
+            continue
+        if summary['store_requests'] + len(stale) > request_budget:
+            break
+
+        # Per-store politeness: space consecutive refreshes
+        delay = next_request_at - time.monotonic()
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    break
+            else:
+                time.sleep(delay)
+        next_request_at = time.monotonic() + store_interval * (1 + random.uniform(0, REFRESH_JITTER))
+
+        summary['store_requests'] += len(stale)
+        try:
+            # Scrape now: cached results could be older than the time they would be saved with
+            prices_data = fetch_prices(product.name, stores=stale, use_cache=False)
+            summary['prices_saved'] += save_prices(product.id, prices_data)
+            db.session.commit()
+            summary['refreshed'] += 1
+        except Exception as e:
+            db.session.rollback()
+            summary['errors'] += 1
+            print(f"Error refreshing prices for {product.name}: {str(e)}")
+
+    summary['seconds'] = round(time.monotonic() - start, 2)
+    return summary
+
+
+class RefreshWorker:
+    """Runs refresh cycles on a background thread until stopped."""
+
+    def __init__(self, app, interval: float = REFRESH_INTERVAL):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_summary: Optional[Dict] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        # Spread the first cycle of several processes over the interval
+        if self._stop.wait(random.uniform(0, self.interval * REFRESH_JITTER)):
+            return
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    self.last_summary = run_refresh_cycle(stop_event=self._stop)
+                    print(f"Price refresh: {self.last_summary}")
+                except Exception as e:
+                    print(f"Error in price refresh cycle: {str(e)}")
+                finally:
+                    db.session.remove()
+            self._stop.wait(self.interval * (1 + random.uniform(0, REFRESH_JITTER)))
+
+
+def init_refresh_worker(app) -> Optional[RefreshWorker]:
+    """
+    Start the in-process refresher if SCRAPER_REFRESH_ENABLED is set.
+    Stored in app.extensions['price_refresher'].
+    """
+    if not REFRESH_ENABLED:
+        return None
+    worker = RefreshWorker(app)
+    app.extensions['price_refresher'] = worker
+    worker.start()
+    return worker
@@ -1,11 +1,19 @@
 """
 Product-related API routes.
 """
-from flask import Blueprint, request, jsonify
-from models import db, Product, Price, SearchHistory
-from scrapers.price_scraper import fetch_prices
-from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, Product, SearchHistory
+from scrapers.price_scraper import fetch_prices, fetch_basket_prices, iter_store_prices
+from scrapers.registry import enabled_store_names
+from price_store import PRICE_FRESH_SECONDS, save_prices, save_product_prices, recent_prices, latest_prices
+from search_history import record_search, pending_searches
+from product_index import resolve_product, resolve_products
+from basket import parse_basket, compare_basket
+from suggest_index import get_suggest_index
+from product_payload import (PRODUCT_CACHE_MAX_AGE, parse_fields, parse_history_days,
+                             product_payload, product_etag)
 from utils import token_required
+import json
 import re
 
 product_bp = Blueprint('product', __name__, url_prefix='')
@@ -19,6 +27,112 @@ def normalize_product_name(name):
     return normalized
 
 
+def _find_or_create_product(product_name, normalized_name):
+    """Find the product for a search, creating it (flushed, not committed) if missing."""
+    # DB-first: exact normalized match, then the best indexed name match to avoid false 404s
+    product = resolve_product(normalized_name)
+    
+    if not product:
+        product = Product(
+            name=product_name,
+            normalized_name=normalized_name,
+            description=f"Price comparison for {product_name}",
+            category="Grocery"
+        )
+        db.session.add(product)
+        db.session.flush()  # Get product.id without committing
+    
+    return product
+
+
+def _stored_prices(product):
+    """
+    Recently refreshed stored prices for a product (PRICE_FRESH_SECONDS).
+    
+    Args:
+        product: Product the search resolved to (None if it is not in the catalog yet)
+    
+    Returns:
+        (fresh price dictionaries, enabled stores without a fresh price, to be scraped)
+    """
+    fresh = recent_prices(product.id) if product is not None else []
+    fresh_stores = {price['store'] for price in fresh}
+    return fresh, [store for store in enabled_store_names() if store not in fresh_stores]
+
+
+def _add_last_known_prices(product, prices_data, unavailable):
+    """
+    Add the last stored price of stores skipped by their breaker or rate limit,
+    instead of waiting for them. Left to _complete_search if nothing else answered.
+    """
+    if prices_data and unavailable and product is not None:
+        prices_data = prices_data + recent_prices(product.id, max_age_seconds=None, stores=unavailable)
+    return prices_data
+
+
+def _complete_search(user, product, product_name, prices_data, use_cached=False):
+    """
+    Persist a search and its scraped prices, and build the search response.
+    Falls back to the last stored prices when scraping produced nothing.
+    
+    Args:
+        user: User who searched
+        product: Product the search resolved to
+        product_name: Product name as entered
+        prices_data: Scraped price dictionaries (may be empty)
+        use_cached: True if scraping failed outright
+    
+    Returns:
+        Response dictionary (product, prices, message and optional warning)
+    """
+    # If scraping failed or returned no data, use cached prices
+    if not prices_data or use_cached:
+        # Latest price per store only, not the product's whole history
+        cached_prices = recent_prices(product.id, max_age_seconds=None)
+        if cached_prices:
+            prices_data = cached_prices
+            use_cached = True
+    
+    if not prices_data:
+        # Never return 404 if we have a matching product in DB; return empty prices gracefully
+        return {
+            'product': product.to_dict(),
+            'prices': [],
+            'warning': '⚠ Live data unavailable, showing last updated prices',
+            'message': f'No cached prices yet for {product.name}. Try again later.'
+        }
+    
+    # Remove duplicates and sort by price
+    unique_prices = {}
+    for price_info in prices_data:
+        store = price_info['store']
+        if store not in unique_prices:
+            unique_prices[store] = price_info
+    
+    prices_data = list(unique_prices.values())
+    prices_data.sort(key=lambda x: x['price'])
+    
+    # Save prices to database (update if exists, insert if new)
+    save_prices(product.id, prices_data)
+    
+    db.session.commit()
+    
+    # Search history is analytics: written behind, outside the price transaction
+    record_search(user.id, product_name, len(prices_data))
+    get_suggest_index().count_search(product.normalized_name)
+    
+    response_data = {
+        'product': product.to_dict(),
+        'prices': prices_data,
+        'message': f'Found {len(prices_data)} prices for {product_name}'
+    }
+    
+    if use_cached:
+        response_data['warning'] = '⚠ Live data unavailable, showing last updated prices'
+    
+    return response_data
+
+
 @product_bp.route('/search', methods=['POST'])
 @token_required
 def search():
@@ -45,176 +159,191 @@ def search():
         
         # Normalize product name
         from utils import normalize_product_name
-        normalized_name = normalize_product_name(product_name)
+        product = _find_or_create_product(product_name, normalize_product_name(product_name))
         
-        # DB-first: try exact normalized match, then prefix/contains to avoid false 404s
-        product = Product.query.filter_by(normalized_name=normalized_name).first()
-        if not product:
-            product = Product.query.filter(
-                Product.normalized_name.like(f'{normalized_name}%')
-            ).order_by(Product.created_at.asc()).first()
-        if not product:
-            product = Product.query.filter(
-                Product.normalized_name.like(f'%{normalized_name}%')
-            ).order_by(Product.created_at.asc()).first()
-        
-        if not product:
-            product = Product(
-                name=product_name,
-                normalized_name=normalized_name,
-                description=f"Price comparison for {product_name}",
-                category="Grocery"
-            )
-            db.session.add(product)
-            db.session.flush()  # Get product.id without committing
-        
-        # Try to fetch prices using scraper, fallback to cached data
-        prices_data = []
+        # Serve recently refreshed prices from the database, scraping only stores without one
+        prices_data, missing = _stored_prices(product)
+        use_cached = False
+        
+        if missing:
+            try:
+                unavailable = []
+                scraped = fetch_prices(product_name, unavailable=unavailable, stores=missing)
+                prices_data = _add_last_known_prices(product, prices_data + scraped, unavailable)
+            except Exception as e:
+                print(f"Scraping error: {str(e)}")
+                # Fallback to cached data from database
+                use_cached = True
+        
+        return jsonify(_complete_search(user, product, product_name, prices_data, use_cached)), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@product_bp.route('/search/stream', methods=['GET'])
+@token_required
+def search_stream():
+    """
+    Search for a product and stream prices as Server-Sent Events.
+    Requires authentication (the auth cookie works with EventSource).
+    
+    Query params:
+        product_name: Product to search for
+    
+    Events:
+        store: {"store", "prices"} (or {"store", "error"}) as soon as each store answers;
+            stores with a fresh stored price (PRICE_FRESH_SECONDS) are sent first, without scraping
+        summary: Same body as POST /search, once every store has answered or timed out
+        error: {"error"} if the search could not be saved
+    """
+    product_name = request.args.get('product_name', '').strip()
+    if not product_name:
+        return jsonify({'error': 'Product name is required'}), 400
+    
+    user = request.current_user
+    
+    def generate():
+        from utils import normalize_product_name
+        normalized_name = normalize_product_name(product_name)
+        product, prices_data = None, []
         use_cached = False
         
         try:
-            prices_data = fetch_prices(product_name)
+            # Same as POST /search: fresh stored prices first, then scrape only the other stores.
+            # A new product is created after scraping, so no write is held open meanwhile.
+            product = resolve_product(normalized_name)
+            prices_data, missing = _stored_prices(product)
+            for price in prices_data:
+                yield _sse('store', {'store': price['store'], 'prices': [price]})
+            
+            unavailable = []
+            if missing:
+                for store, results, error in iter_store_prices(product_name, stores=missing,
+                                                               unavailable=unavailable):
+                    if error:
+                        yield _sse('store', {'store': store, 'error': error})
+                        continue
+                    prices_data.extend(results)
+                    yield _sse('store', {'store': store, 'prices': results})
+            prices_data = _add_last_known_prices(product, prices_data, unavailable)
         except Exception as e:
             print(f"Scraping error: {str(e)}")
-            # Fallback to cached data from database
             use_cached = True
         
-        # If scraping failed or returned no data, use cached prices
-        if not prices_data or use_cached:
-            try:
-                # Try scraped_at first, fallback to recorded_at for backward compatibility
-                cached_prices = Price.query.filter_by(product_id=product.id).order_by(
-                    Price.scraped_at.desc()
-                ).all()
-            except:
-                # Fallback for old schema
-                cached_prices = Price.query.filter_by(product_id=product.id).order_by(
-                    Price.recorded_at.desc()
-                ).all()
-            
-            if cached_prices:
-                # Group by store and get latest price per store
-                store_prices = {}
-                for cp in cached_prices:
-                    if cp.store_name not in store_prices:
-                        product_url = getattr(cp, 'product_url', None) or getattr(cp, 'link', '')
-                        store_prices[cp.store_name] = {
-                            'store': cp.store_name,
-                            'price': float(cp.price),
-                            'currency': cp.currency or 'INR',
-                            'link': product_url,
-                            'product_url': product_url,
-                            'in_stock': cp.in_stock,
-                            'cached': True
-                        }
-                
-                prices_data = list(store_prices.values())
-                use_cached = True
+        try:
+            product = product or _find_or_create_product(product_name, normalized_name)
+            yield _sse('summary', _complete_search(user, product, product_name, prices_data, use_cached))
+        except Exception as e:
+            db.session.rollback()
+            yield _sse('error', {'error': str(e)})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@product_bp.route('/search/basket', methods=['POST'])
+@token_required
+def search_basket():
+    """
+    Compare a whole shopping list across stores.
+    Requires authentication.
+    
+    Each item is scraped only at the stores without a recently stored price for it,
+    all in one fan-out with concurrency bounded across the basket (SCRAPER_BASKET_CONCURRENCY).
+    All prices are saved in one transaction.
+    
+    Expected JSON:
+    {
+        "items": [{"product_name": "milk", "quantity": 2}, {"product_name": "bread"}]
+    }
+    
+    Returns:
+        items (product and prices per item), stores (per-store basket total and
+        missing items), cheapest_store and cheapest_split
+    """
+    try:
+        try:
+            items = parse_basket(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if not prices_data:
-            # Never return 404 if we have a matching product in DB; return empty prices gracefully
-            return jsonify({
-                'product': product.to_dict(),
-                'prices': [],
-                'warning': '⚠ Live data unavailable, showing last updated prices',
-                'message': f'No cached prices yet for {product.name}. Try again later.'
-            }), 200
-        
-        # Remove duplicates and sort by price
-        unique_prices = {}
-        for price_info in prices_data:
-            store = price_info['store']
-            if store not in unique_prices:
-                unique_prices[store] = price_info
-        
-        prices_data = list(unique_prices.values())
-        prices_data.sort(key=lambda x: x['price'])
-        
-        # Save search history
-        search_history = SearchHistory(
-            user_id=user.id,
-            query=product_name,
-            results_count=len(prices_data)
-        )
-        db.session.add(search_history)
+        user = request.current_user
         
-        # Save prices to database (update if exists, insert if new)
-        current_time = datetime.utcnow()
-        seen_stores = set()  # Track stores to prevent duplicates
+        # Resolve every item in batched queries, creating missing products in one flush
+        from utils import normalize_product_name
+        for item in items:
+            item['normalized_name'] = normalize_product_name(item['product_name'])
+        products = resolve_products([item['normalized_name'] for item in items])
         
-        for price_info in prices_data:
-            store_name = price_info['store']
-            
-            # Skip if we've already processed this store (prevent duplicates)
-            if store_name in seen_stores:
-                continue
-            seen_stores.add(store_name)
-            
-            # Check if price exists for this product+store (same day)
+        created = []
+        for item in items:
+            product = products.get(item['normalized_name'])
+            if product is None:
+                product = Product(
+                    name=item['product_name'],
+                    normalized_name=item['normalized_name'],
+                    description=f"Price comparison for {item['product_name']}",
+                    category="Grocery"
+                )
+                products[item['normalized_name']] = product
+                created.append(product)
+            item['product'] = product
+        if created:
+            db.session.add_all(created)
+            db.session.flush()  # Get product ids without committing
+        
+        # Serve recently refreshed prices from the database, scraping each item
+        # only at the stores without one (like _stored_prices for /search)
+        fresh = latest_prices([item['product'].id for item in items], PRICE_FRESH_SECONDS)
+        store_names = enabled_store_names()
+        missing = {}
+        for item in items:
+            fresh_stores = {price['store'] for price in fresh.get(item['product'].id, [])}
+            stores = [store for store in store_names if store not in fresh_stores]
+            if stores:
+                missing[item['product_name']] = stores
+        scraped = {}
+        if missing:
             try:
-                existing_price = Price.query.filter_by(
-                    product_id=product.id,
-                    store_name=store_name
-                ).filter(
-                    Price.scraped_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                ).first()
-            except:
-                # Fallback for old schema
-                existing_price = Price.query.filter_by(
-                    product_id=product.id,
-                    store_name=store_name
-                ).filter(
-                    Price.recorded_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                ).first()
-            
-            product_url = price_info.get('link') or price_info.get('product_url', '')
-            
-            if existing_price:
-                # Update existing price
-                existing_price.price = round(float(price_info['price']), 2)
-                existing_price.currency = price_info.get('currency', 'INR')
-                if hasattr(existing_price, 'product_url'):
-                    existing_price.product_url = product_url
-                elif hasattr(existing_price, 'link'):
-                    existing_price.link = product_url
-                existing_price.in_stock = price_info.get('in_stock', True)
-                if hasattr(existing_price, 'scraped_at'):
-                    existing_price.scraped_at = current_time
-                elif hasattr(existing_price, 'recorded_at'):
-                    existing_price.recorded_at = current_time
-            else:
-                # Insert new price (handle both old and new schema)
-                price_data = {
-                    'product_id': product.id,
-                    'store_name': store_name,
-                    'price': round(float(price_info['price']), 2),
-                    'currency': price_info.get('currency', 'INR'),
-                    'in_stock': price_info.get('in_stock', True),
-                }
-                
-                # Use new schema fields if available
-                if hasattr(Price, 'product_url'):
-                    price_data['product_url'] = product_url
-                if hasattr(Price, 'scraped_at'):
-                    price_data['scraped_at'] = current_time
-                else:
-                    # Fallback for old schema
-                    price_data['link'] = product_url
-                    price_data['recorded_at'] = current_time
-                
-                price = Price(**price_data)
-                db.session.add(price)
+                scraped = fetch_basket_prices(list(missing), stores=missing)
+            except Exception as e:
+                print(f"Scraping error: {str(e)}")
         
+        # Items no store answered for fall back to their last stored prices
+        unanswered = [item['product'].id for item in items
+                      if item['product'].id not in fresh and not scraped.get(item['product_name'])]
+        stored = latest_prices(unanswered) if unanswered else {}
+        
+        for item in items:
+            product_id = item['product'].id
+            item['prices'] = (fresh.get(product_id, []) + scraped.get(item['product_name'], [])
+                              or stored.get(product_id, []))
+            item['prices'].sort(key=lambda x: x['price'])
+        
+        save_product_prices({item['product'].id: item['prices'] for item in items})
         db.session.commit()
         
-        response_data = {
-            'product': product.to_dict(),
-            'prices': prices_data,
-            'message': f'Found {len(prices_data)} prices for {product_name}'
-        }
+        for item in items:
+            record_search(user.id, item['product_name'], len(item['prices']))
+            get_suggest_index().count_search(item['product'].normalized_name)
         
-        if use_cached:
-            response_data['warning'] = '⚠ Live data unavailable, showing last updated prices'
+        response_data = compare_basket(items)
+        response_data['items'] = [{
+            'product_name': item['product_name'],
+            'quantity': item['quantity'],
+            'product': {'id': item['product'].id, 'name': item['product'].name},
+            'prices': item['prices']
+        } for item in items]
+        response_data['message'] = f'Compared {len(items)} items across {len(response_data["stores"])} stores'
+        if any(item['product'].id in stored for item in items):
+            response_data['warning'] = '⚠ Live data unavailable for some items, showing last updated prices'
         
         return jsonify(response_data), 200
         
@@ -232,10 +361,36 @@ def get_product(product_id):
     
     Args:
         product_id: ID of the product
+    
+    Query params:
+        fields: Comma-separated keys to return, e.g. "id,name,prices" (default all)
+        history_days: Include every price from the last N days instead of the newest
+            price per store (capped at PRODUCT_HISTORY_MAX_ROWS rows); 0 < N <= PRODUCT_HISTORY_MAX_DAYS
+    
+    Responses carry a weak ETag; a matching If-None-Match gets 304 Not Modified.
     """
     try:
-        product = Product.query.get_or_404(product_id)
-        return jsonify(product.to_dict()), 200
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            history_days = parse_history_days(request.args.get('history_days'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Revalidate with one cheap query; unchanged products are not loaded or serialized
+        etag = product_etag(product_id, fields, history_days)
+        if etag is None:
+            return jsonify({'error': 'Product not found'}), 404
+        cache_control = f'private, max-age={PRODUCT_CACHE_MAX_AGE}, must-revalidate'
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            payload = product_payload(product_id, fields, history_days)
+            if payload is None:
+                return jsonify({'error': 'Product not found'}), 404
+            response = jsonify(payload)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = cache_control
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -247,12 +402,21 @@ def get_search_history():
     """Get user's search history. Requires authentication."""
     try:
         user = request.current_user
-        history = SearchHistory.query.filter_by(user_id=user.id).order_by(
+        # Searches still waiting in the write-behind buffer, read before the table so a
+        # batch written in between is found in the table instead of in neither
+        pending = pending_searches(user.id)
+        
+        # SearchHistory.query is the search text column, so go through the session
+        history = [h.to_dict() for h in db.session.query(SearchHistory).filter_by(user_id=user.id).order_by(
             SearchHistory.searched_at.desc()
-        ).limit(50).all()
+        ).limit(50).all()]
+        
+        # A batch written between the two reads is in both; keep its table rows
+        written = {(h['query'], h['searched_at']) for h in history}
+        pending = [h for h in pending if (h['query'], h['searched_at']) not in written]
         
         return jsonify({
-            'history': [h.to_dict() for h in history]
+            'history': (pending + history)[:50]
         }), 200
         
     except Exception as e:
@@ -268,9 +432,14 @@ def suggest_products():
     
     Query params:
         q: partial product name (min 2 characters)
+        mode: prefix (default) or fuzzy, which also suggests names within a few typos
+              ("panner" -> paneer) once the in-memory index is built
     """
     try:
         query = request.args.get('q', '').strip()
+        mode = request.args.get('mode', 'prefix')
+        if mode not in ('prefix', 'fuzzy'):
+            return jsonify({'error': 'mode must be prefix or fuzzy'}), 400
         
         # 1-character suggestions are required (e.g., "m" -> "milk")
         if len(query) < 1:
@@ -279,6 +448,13 @@ def suggest_products():
         # Search in normalized_name for better matching
         normalized_query = normalize_product_name(query)
         
+        # In-memory index: no database access once it is built
+        index = get_suggest_index()
+        if index.ready:
+            if mode == 'fuzzy':
+                return jsonify({'suggestions': index.fuzzy(normalized_query, limit=10)}), 200
+            return jsonify({'suggestions': index.suggest(normalized_query, limit=10)}), 200
+        
         # Prefix match for true autocomplete behavior (m -> milk, mi -> milk)
         products = Product.query.filter(
             Product.normalized_name.like(f'{normalized_query}%')
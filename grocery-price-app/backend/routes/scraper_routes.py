@@ -0,0 +1,61 @@
+"""
+Scraper monitoring routes for operations.
+"""
+from flask import Blueprint, jsonify
+from scrapers.session_manager import get_session_stats
+from scrapers.executor import get_scraper_executor
+from scrapers.async_engine import get_engine_stats
+from scrapers.cache import get_scraper_cache
+from scrapers.price_scraper import get_single_flight
+from scrapers.health import get_store_health
+from scrapers.registry import enabled_store_names
+from scrapers.conditional import get_validator_store
+from scrapers.rate_limit import get_rate_limiter
+from harvest import get_harvest_stats
+from search_history import get_search_history_stats
+from suggest_index import get_suggest_index
+
+scraper_bp = Blueprint('scraper', __name__, url_prefix='/scrapers')
+
+
+@scraper_bp.route('/stats', methods=['GET'])
+def scraper_stats():
+    """
+    Get scraper runtime statistics.
+    No auth required (same as /health), exposes counters only.
+    """
+    try:
+        return jsonify({
+            'sessions': get_session_stats(),
+            'executor': get_scraper_executor().stats(),
+            'async_engine': get_engine_stats(),
+            'cache': get_scraper_cache().stats(),
+            'coalescing': get_single_flight().stats(),
+            'harvest': get_harvest_stats(),
+            'search_history': get_search_history_stats(),
+            'conditional': get_validator_store().stats(),
+            'rate_limit': get_rate_limiter().stats(),
+            'suggest_index': get_suggest_index().stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@scraper_bp.route('/health', methods=['GET'])
+def scraper_health():
+    """
+    Get circuit breaker state, p95 latency, adaptive timeout and error rate per store.
+    No auth required (same as /health).
+    """
+    try:
+        stores = {name: get_store_health(name).to_dict() for name in enabled_store_names()}
+        open_stores = [name for name, health in stores.items() if health['state'] != 'closed']
+        return jsonify({
+            'status': 'degraded' if open_stores else 'healthy',
+            'open_breakers': open_stores,
+            'stores': stores
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
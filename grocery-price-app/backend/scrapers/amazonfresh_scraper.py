@@ -1,10 +1,10 @@
 """
 Amazon Fresh (India) scraper for grocery prices.
+Declarative store spec; the adapter registry compiles it into an extraction plan.
 """
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict, List, Optional
-import re
+
+from scrapers.registry import get_adapter
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -15,6 +15,44 @@ HEADERS = {
 }
 
 
+STORE_SPEC = {
+    'name': 'Amazon Fresh',
+    'base_url': 'https://www.amazon.in',
+    # {query} is the URL-quoted product name with spaces replaced by query_space
+    'search_path': '/s?k={query}&rh=n%3A4859498011',
+    'query_space': '+',
+    'headers': HEADERS,
+    # Product card selectors, in priority order
+    'card': [
+        ('div', {'data-component-type': 's-search-result'}),
+    ],
+    # Price element selectors, in priority order
+    'price': [
+        ('span', {'class': 'a-price-whole'}),
+        ('span', {'class': 'a-price'}),
+        ('span', {'class': 'a-offscreen'}),
+    ],
+    # Product name selectors (used when harvesting every card on a page); link text is
+    # not a name, so cards without one of these are not harvested
+    'product_name': [
+        ('span', {'class': 'a-text-normal'}),
+        ('h2', {}),
+    ],
+    'link': [
+        ('a', {'class': 'a-link-normal', 'href': True}),
+    ],
+    # Characters stripped from the price text before float()
+    'price_strip': r'[^\d.]',
+    'out_of_stock': {
+        'selectors': [
+            ('span', {'class': 'a-color-state'}),
+        ],
+        # Amazon shows availability text; only this text means out of stock
+        'text': 'out of stock',
+    },
+}
+
+
 def scrape_amazon_fresh(product_name: str) -> Optional[Dict]:
     """
     Scrape Amazon Fresh (India) for product prices.
@@ -25,64 +63,9 @@ def scrape_amazon_fresh(product_name: str) -> Optional[Dict]:
     Returns:
         Dictionary with price information or None if not found
     """
-    try:
-        # Amazon Fresh search URL
-        search_url = f"https://www.amazon.in/s?k={product_name.replace(' ', '+')}&rh=n%3A4859498011"
-        
-        response = requests.get(search_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find first product result
-        product_card = soup.find('div', {'data-component-type': 's-search-result'})
-        
-        if not product_card:
-            return None
-        
-        # Extract price
-        price_element = (
-            product_card.find('span', class_='a-price-whole') or
-            product_card.find('span', class_='a-price') or
-            product_card.find('span', class_='a-offscreen')
-        )
-        
-        if not price_element:
-            return None
-        
-        price_text = price_element.get_text(strip=True)
-        # Extract numeric price
-        price = float(re.sub(r'[^\d.]', '', price_text))
-        
-        # Extract product link
-        link_element = product_card.find('a', class_='a-link-normal', href=True)
-        product_link = link_element['href'] if link_element else None
-        
-        if product_link and not product_link.startswith('http'):
-            product_link = f"https://www.amazon.in{product_link}"
-        
-        # Check stock status (Amazon usually shows availability)
-        stock_element = product_card.find('span', class_='a-color-state')
-        in_stock = 'out of stock' not in (stock_element.get_text().lower() if stock_element else '')
-        
-        # Ensure we always return a real URL
-        final_link = product_link if product_link and product_link.startswith('http') else search_url
-        
-        return {
-            'store': 'Amazon Fresh',
-            'price': round(price, 2),
-            'currency': 'INR',
-            'link': final_link,
-            'in_stock': in_stock
-        }
-        
-    except Exception as e:
-        print(f"Error scraping Amazon Fresh: {str(e)}")
-        return None
+    return get_adapter(STORE_SPEC['name']).scrape(product_name)
 
 
 def fetch_amazonfresh_prices(product_name: str) -> List[Dict]:
     """Fetch prices from Amazon Fresh."""
-    result = scrape_amazon_fresh(product_name)
-    return [result] if result else []
-
+    return get_adapter(STORE_SPEC['name']).fetch_prices(product_name)
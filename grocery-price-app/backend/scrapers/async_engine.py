@@ -0,0 +1,207 @@
+"""
+asyncio engine for the store scrapers.
+Runs one background event loop per process with a pooled aiohttp client and
+per-host semaphores, so in-flight store requests cost coroutines, not threads.
+"""
+import os
+import atexit
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from scrapers.conditional import PageResponse
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency; fetch_prices_async falls back to the thread pool
+    aiohttp = None
+
+
+# Total keep-alive connections held by the async client
+ASYNC_POOL_LIMIT = int(os.getenv('SCRAPER_ASYNC_POOL_LIMIT', 200))
+# In-flight requests allowed against one store host
+HOST_CONCURRENCY = int(os.getenv('SCRAPER_HOST_CONCURRENCY', 32))
+# Threads used to parse HTML off the event loop
+PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', os.cpu_count() or 4))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv('SCRAPER_REQUEST_TIMEOUT', 10))
+
+
+def is_available() -> bool:
+    """Return True if the async HTTP client (aiohttp) is installed."""
+    return aiohttp is not None
+
+
+class _LoopState:
+    """Client session and host semaphores bound to one event loop."""
+
+    def __init__(self):
+        self.client = None
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+
+    def get_client(self):
+        if self.client is None or self.client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=ASYNC_POOL_LIMIT,
+                limit_per_host=HOST_CONCURRENCY,
+                ttl_dns_cache=300,
+            )
+            self.client = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+            )
+        return self.client
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self.host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(HOST_CONCURRENCY)
+            self.host_limits[host] = limit
+        return limit
+
+
+_states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+_parse_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _states.get(loop)
+    if state is None:
+        state = _LoopState()
+        _states[loop] = state
+    return state
+
+
+def _get_parse_pool() -> ThreadPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        with _loop_lock:
+            if _parse_pool is None:
+                _parse_pool = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix='scraper-parse')
+    return _parse_pool
+
+
+async def fetch_page(url: str, headers: Optional[Dict] = None,
+                     timeout: float = REQUEST_TIMEOUT_SECONDS) -> PageResponse:
+    """
+    GET a URL through the pooled async client, keeping status and transfer details.
+    A 304 Not Modified is returned rather than raised.
+
+    Args:
+        url: URL to fetch
+        headers: Request headers
+        timeout: Total request timeout in seconds
+
+    Returns:
+        PageResponse with status, body, headers and bytes on the wire
+
+    Raises:
+        aiohttp.ClientError / asyncio.TimeoutError on failure or 4xx/5xx status
+    """
+    state = _state()
+    client = state.get_client()
+    async with state.host_limit(urlsplit(url).netloc):
+        state.requests += 1
+        async with client.get(url, headers=headers,
+                              timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            body = await response.read()
+            # aiohttp decodes transparently; Content-Length is the size on the wire
+            wire_bytes = response.content_length if response.headers.get('Content-Encoding') else None
+            return PageResponse(response.status, body, response.headers, wire_bytes)
+
+
+async def run_parser(func: Callable, *args):
+    """Run a CPU-bound parse function on the parse pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_parse_pool(), func, *args)
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, starting it on first use (or after a fork)."""
+    global _loop, _loop_thread, _loop_pid
+    if _loop is not None and _loop_pid == os.getpid():
+        return _loop
+
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='scraper-event-loop', daemon=True)
+            thread.start()
+            _loop, _loop_thread, _loop_pid = loop, thread, os.getpid()
+        return _loop
+
+
+def run_coroutine(coro, timeout: Optional[float] = None):
+    """
+    Run a coroutine on the background loop and wait for its result.
+    Lets synchronous code (Flask views, scripts) call the async engine.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Optional seconds to wait for the result
+
+    Raises:
+        RuntimeError: If called from the background loop itself (would deadlock)
+    """
+    return submit_coroutine(coro).result(timeout)
+
+
+def submit_coroutine(coro) -> Future:
+    """
+    Schedule a coroutine on the background loop without waiting for it.
+
+    Returns:
+        concurrent.futures.Future for the coroutine's result
+
+    Raises:
+        RuntimeError: If called from the background loop itself
+    """
+    loop = _get_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError('Blocking scraper calls cannot be made from the scraper event loop')
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def get_engine_stats() -> Dict:
+    """Return async engine configuration and counters for the background loop."""
+    state = _states.get(_loop) if _loop is not None else None
+    return {
+        'available': is_available(),
+        'pool_limit': ASYNC_POOL_LIMIT,
+        'host_concurrency': HOST_CONCURRENCY,
+        'requests': state.requests if state else 0,
+    }
+
+
+async def _close_clients():
+    state = _states.pop(asyncio.get_running_loop(), None)
+    if state and state.client and not state.client.closed:
+        await state.client.close()
+
+
+def shutdown_engine():
+    """Close the async client and stop the background loop (called on interpreter shutdown)."""
+    global _loop, _loop_thread, _parse_pool
+    loop = _loop
+    if loop is not None and _loop_pid == os.getpid() and loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(5)
+        except Exception as e:
+            print(f"Error closing async scraper client: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+    _loop = _loop_thread = None
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+atexit.register(shutdown_engine)
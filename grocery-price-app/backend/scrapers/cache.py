@@ -0,0 +1,147 @@
+"""
+In-memory TTL + LRU cache for scraper results.
+Entries are keyed by (store, normalized query) and can be served stale for a
+short window while a background refresh fetches the live price.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+CACHE_MAX_ENTRIES = int(os.getenv('SCRAPER_CACHE_MAX_ENTRIES', 5000))
+# Seconds a store result is considered fresh
+CACHE_TTL = float(os.getenv('SCRAPER_CACHE_TTL', 300))
+# Extra seconds an expired result may still be served while it is refreshed
+CACHE_STALE_TTL = float(os.getenv('SCRAPER_CACHE_STALE_TTL', 600))
+# Seconds a "product not found" result is cached
+CACHE_NEGATIVE_TTL = float(os.getenv('SCRAPER_CACHE_NEGATIVE_TTL', 60))
+# Per-store TTL overrides, e.g. "Zepto=120,Swiggy Instamart=120"
+CACHE_STORE_TTLS = os.getenv('SCRAPER_CACHE_STORE_TTLS', '')
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def _parse_store_ttls(value: str) -> Dict[str, float]:
+    """Parse "Store=seconds,Store=seconds" into a dict."""
+    store_ttls = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        store, ttl = item.rsplit('=', 1)
+        try:
+            store_ttls[store.strip()] = float(ttl)
+        except ValueError:
+            print(f"Ignoring invalid cache TTL for {store.strip()}: {ttl}")
+    return store_ttls
+
+
+class ScraperCache:
+    """
+    Thread-safe LRU cache of per-store scraper results.
+
+    Args:
+        max_entries: Maximum number of (store, query) entries kept
+        ttl: Default fresh lifetime in seconds
+        stale_ttl: Seconds past expiry an entry may still be served stale
+        negative_ttl: Fresh lifetime for empty (not found) results
+        store_ttls: Per-store overrides of ttl
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL,
+                 stale_ttl: float = CACHE_STALE_TTL, negative_ttl: float = CACHE_NEGATIVE_TTL,
+                 store_ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.store_ttls = store_ttls or {}
+
+        # key -> (results, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[Dict], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0,
+                       'refreshes': 0}
+
+    def ttl_for(self, store_name: str, results: List[Dict]) -> float:
+        if not results:
+            return self.negative_ttl
+        return self.store_ttls.get(store_name, self.ttl)
+
+    def get(self, store_name: str, query: str) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Look up a store result.
+
+        Returns:
+            (results, FRESH | STALE) on a hit, (None, None) on a miss
+        """
+        key = (store_name, query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None, None
+
+            results, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None, None
+
+            self._entries.move_to_end(key)
+            if now < expires_at:
+                self._stats['hits'] += 1
+                state = FRESH
+            else:
+                self._stats['stale_hits'] += 1
+                state = STALE
+
+        # Copies so callers can't mutate the cached entry
+        return [dict(result) for result in results], state
+
+    def set(self, store_name: str, query: str, results: List[Dict]):
+        """Store a store result, evicting the least recently used entries if full."""
+        key = (store_name, query)
+        expires_at = time.monotonic() + self.ttl_for(store_name, results)
+        with self._lock:
+            self._entries[key] = ([dict(result) for result in results], expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def count_refresh(self):
+        """Count a background refresh started for a stale entry."""
+        with self._lock:
+            self._stats['refreshes'] += 1
+
+    def invalidate(self, store_name: Optional[str] = None):
+        """Drop all entries, or only those of one store."""
+        with self._lock:
+            if store_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == store_name]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+_cache = ScraperCache(store_ttls=_parse_store_ttls(CACHE_STORE_TTLS))
+
+
+def get_scraper_cache() -> ScraperCache:
+    """Get the process-wide scraper result cache."""
+    return _cache
@@ -0,0 +1,182 @@
+"""
+Conditional requests for store search pages.
+Remembers each URL's validators (ETag, Last-Modified, body hash) and parsed
+result, so a 304 or an unchanged body skips the download and/or the parse.
+Also tracks per-store transfer sizes to confirm compression is in use.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+try:
+    import brotli  # noqa: F401  (lets aiohttp/urllib3 decode br)
+    _HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _HAS_BROTLI = True
+    except ImportError:
+        _HAS_BROTLI = False
+
+
+VALIDATOR_MAX_ENTRIES = int(os.getenv('SCRAPER_VALIDATOR_MAX_ENTRIES', 10000))
+
+# Only advertise encodings the HTTP clients can actually decode
+ACCEPT_ENCODING = 'gzip, deflate, br' if _HAS_BROTLI else 'gzip, deflate'
+
+
+class PageResponse:
+    """Status, body and transfer details of one fetched page."""
+
+    def __init__(self, status: int, body: bytes, headers: Dict[str, str], wire_bytes: Optional[int] = None):
+        self.status = status
+        self.body = body
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        self.content_encoding = (headers.get('Content-Encoding') or '').lower() or None
+        # Bytes on the wire (compressed size); falls back to the decoded size when unknown
+        self.wire_bytes = wire_bytes if wire_bytes is not None else len(body)
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class _Validators:
+    __slots__ = ('etag', 'last_modified', 'body_hash', 'body_size', 'results')
+
+    def __init__(self, etag, last_modified, digest, body_size, results):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = digest
+        self.body_size = body_size
+        self.results = results
+
+
+def _new_counters() -> Dict:
+    return {
+        'requests': 0,
+        'conditional_requests': 0,
+        'not_modified': 0,
+        'unchanged_bodies': 0,
+        'parses_skipped': 0,
+        'compressed_responses': 0,
+        'uncompressed_responses': 0,
+        'bytes_received': 0,
+        'bytes_decoded': 0,
+        'bytes_saved_not_modified': 0,
+        'bytes_saved_compression': 0,
+    }
+
+
+class ValidatorStore:
+    """LRU of per-URL validators and parsed results, with per-store counters."""
+
+    def __init__(self, max_entries: int = VALIDATOR_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, _Validators]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def _counters(self, store: str) -> Dict:
+        counters = self._stats.get(store)
+        if counters is None:
+            counters = _new_counters()
+            self._stats[store] = counters
+        return counters
+
+    def request_headers(self, store: str, url: str, headers: Dict) -> Dict:
+        """Request headers with a decodable Accept-Encoding and the URL's validators."""
+        headers = dict(headers)
+        headers['Accept-Encoding'] = ACCEPT_ENCODING
+        with self._lock:
+            entry = self._entries.get(url)
+            counters = self._counters(store)
+            counters['requests'] += 1
+            if entry is None:
+                return headers
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+            if entry.etag or entry.last_modified:
+                counters['conditional_requests'] += 1
+        return headers
+
+    def unchanged_results(self, store: str, url: str, page: PageResponse) -> Optional[List[Dict]]:
+        """
+        Return the previous parse if the page has not changed (304 or same body), else None.
+        Also records transfer and compression counters for the response.
+        """
+        with self._lock:
+            counters = self._counters(store)
+            counters['bytes_received'] += page.wire_bytes
+            entry = self._entries.get(url)
+
+            if page.status == 304:
+                if entry is None:
+                    return None
+                self._entries.move_to_end(url)
+                counters['not_modified'] += 1
+                counters['parses_skipped'] += 1
+                counters['bytes_saved_not_modified'] += max(0, entry.body_size - page.wire_bytes)
+                return [dict(result) for result in entry.results]
+
+            counters['bytes_decoded'] += len(page.body)
+            if page.content_encoding and page.content_encoding != 'identity':
+                counters['compressed_responses'] += 1
+                counters['bytes_saved_compression'] += max(0, len(page.body) - page.wire_bytes)
+            else:
+                counters['uncompressed_responses'] += 1
+
+            if entry is None or entry.body_hash != body_hash(page.body):
+                return None
+
+            # Same bytes as last time: keep the parse, pick up any new validators
+            self._entries.move_to_end(url)
+            entry.etag = page.etag or entry.etag
+            entry.last_modified = page.last_modified or entry.last_modified
+            counters['unchanged_bodies'] += 1
+            counters['parses_skipped'] += 1
+            return [dict(result) for result in entry.results]
+
+    def remember(self, url: str, page: PageResponse, results: List[Dict]):
+        """Store validators and the parsed results for a freshly parsed page."""
+        entry = _Validators(page.etag, page.last_modified, body_hash(page.body), len(page.body),
+                            [dict(result) for result in results])
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Per-store counters plus totals."""
+        with self._lock:
+            stores = {store: dict(counters) for store, counters in self._stats.items()}
+            size = len(self._entries)
+        totals = _new_counters()
+        for counters in stores.values():
+            for key, value in counters.items():
+                totals[key] += value
+        totals['bytes_saved'] = totals['bytes_saved_not_modified'] + totals['bytes_saved_compression']
+        return {
+            'accept_encoding': ACCEPT_ENCODING,
+            'entries': size,
+            'totals': totals,
+            'stores': stores,
+        }
+
+
+_validator_store = ValidatorStore()
+
+
+def get_validator_store() -> ValidatorStore:
+    """Get the process-wide validator store."""
+    return _validator_store
@@ -0,0 +1,213 @@
+"""
+Long-lived thread pool shared by all scraper calls.
+Bounds how many store scrapes can be running or queued at once, caps the
+concurrency per store, and enforces one overall deadline per search.
+"""
+import os
+import time
+import atexit
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+
+DEFAULT_MAX_WORKERS = int(os.getenv('SCRAPER_MAX_WORKERS', 16))
+DEFAULT_QUEUE_DEPTH = int(os.getenv('SCRAPER_QUEUE_DEPTH', 64))
+DEFAULT_STORE_CONCURRENCY = int(os.getenv('SCRAPER_STORE_CONCURRENCY', 6))
+DEFAULT_DEADLINE_SECONDS = float(os.getenv('SCRAPER_DEADLINE_SECONDS', 15))
+
+
+class ScraperQueueFull(Exception):
+    """Raised when the scraper pool has no room for another search."""
+
+
+class ScraperExecutor:
+    """
+    Shared executor for store scrapers.
+
+    Args:
+        max_workers: Number of scraper threads
+        queue_depth: Extra tasks allowed to wait for a free thread
+        store_concurrency: Max scrapes running at once against a single store
+        deadline_seconds: Default overall deadline for one search fan-out
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 queue_depth: int = DEFAULT_QUEUE_DEPTH,
+                 store_concurrency: int = DEFAULT_STORE_CONCURRENCY,
+                 deadline_seconds: float = DEFAULT_DEADLINE_SECONDS):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.store_concurrency = store_concurrency
+        self.deadline_seconds = deadline_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper')
+        # Slots for running + queued tasks; the pool itself has an unbounded queue
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._store_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'rejected': 0, 'timed_out': 0, 'failed': 0, 'completed': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _store_limit(self, store_name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._store_limits.get(store_name)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.store_concurrency)
+                self._store_limits[store_name] = limit
+            return limit
+
+    def _run_capped(self, store_name: str, func: Callable, deadline: Optional[float], args: tuple):
+        """Run a scraper once its store has a free concurrency slot."""
+        limit = self._store_limit(store_name)
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError(f"Deadline passed before {store_name} scrape started")
+        if not limit.acquire(timeout=remaining):
+            raise TimeoutError(f"{store_name} concurrency cap reached")
+        try:
+            return func(*args)
+        finally:
+            limit.release()
+
+    def submit(self, store_name: str, func: Callable, *args, deadline: Optional[float] = None) -> Future:
+        """
+        Queue a scraper call for a store.
+
+        Args:
+            store_name: Store the call targets (used for the per-store cap)
+            func: Scraper function
+            deadline: Optional time.monotonic() value after which the call is not started
+
+        Raises:
+            ScraperQueueFull: If running + queued tasks are at the limit
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise ScraperQueueFull(f"Scraper queue full, skipping {store_name}")
+
+        try:
+            future = self._executor.submit(self._run_capped, store_name, func, deadline, args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._count('submitted')
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run_stores(self, scrapers: List[Tuple[str, Callable]], product_name: str,
+                   timeout: Optional[float] = None) -> Dict[str, List[Dict]]:
+        """
+        Run one scraper per store under a single overall deadline.
+
+        Args:
+            scrapers: (store_name, scraper_func) pairs
+            product_name: Product passed to every scraper
+            timeout: Seconds until the whole fan-out gives up (defaults to deadline_seconds)
+
+        Returns:
+            Results for the stores that finished in time, keyed by store name
+
+        Raises:
+            ScraperQueueFull: If no store could be queued at all
+        """
+        deadline = time.monotonic() + (self.deadline_seconds if timeout is None else timeout)
+        future_to_store = {}
+        for store_name, scraper_func in scrapers:
+            try:
+                future = self.submit(store_name, scraper_func, product_name, deadline=deadline)
+                future_to_store[future] = store_name
+            except ScraperQueueFull as e:
+                print(str(e))
+
+        if scrapers and not future_to_store:
+            raise ScraperQueueFull('Scraper queue full, no stores queued')
+
+        done, not_done = wait(future_to_store, timeout=max(0.0, deadline - time.monotonic()))
+
+        for future in not_done:
+            # Queued calls are dropped; calls already running finish in the background
+            future.cancel()
+            self._count('timed_out')
+            print(f"Timed out fetching prices from {future_to_store[future]}")
+
+        results = {}
+        for future in done:
+            store_name = future_to_store[future]
+            try:
+                results[store_name] = future.result()
+                self._count('completed')
+            except Exception as e:
+                self._count('failed')
+                print(f"Error fetching prices from {store_name}: {str(e)}")
+
+        return results
+
+    def stats(self) -> Dict:
+        """Return pool configuration and task counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'max_workers': self.max_workers,
+            'queue_depth': self.queue_depth,
+            'store_concurrency': self.store_concurrency,
+            'deadline_seconds': self.deadline_seconds,
+        })
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and drop anything still queued."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: Optional[ScraperExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_scraper_executor() -> ScraperExecutor:
+    """Get the process-wide scraper executor, creating a default one if needed."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ScraperExecutor()
+    return _executor
+
+
+def init_scraper_executor(app) -> ScraperExecutor:
+    """
+    Create the scraper executor owned by the Flask app.
+
+    Reads SCRAPER_MAX_WORKERS, SCRAPER_QUEUE_DEPTH, SCRAPER_STORE_CONCURRENCY and
+    SCRAPER_DEADLINE_SECONDS from app.config and stores the executor in app.extensions.
+    """
+    global _executor
+    executor = ScraperExecutor(
+        max_workers=app.config.get('SCRAPER_MAX_WORKERS', DEFAULT_MAX_WORKERS),
+        queue_depth=app.config.get('SCRAPER_QUEUE_DEPTH', DEFAULT_QUEUE_DEPTH),
+        store_concurrency=app.config.get('SCRAPER_STORE_CONCURRENCY', DEFAULT_STORE_CONCURRENCY),
+        deadline_seconds=app.config.get('SCRAPER_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS),
+    )
+    with _executor_lock:
+        previous, _executor = _executor, executor
+    if previous is not None:
+        previous.shutdown()
+
+    app.extensions['scraper_executor'] = executor
+    return executor
+
+
+def shutdown_scraper_executor():
+    """Shut down the process-wide executor (called on interpreter shutdown)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+atexit.register(shutdown_scraper_executor)
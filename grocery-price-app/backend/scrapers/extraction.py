@@ -0,0 +1,113 @@
+"""
+Fast product-card extraction for store search pages.
+Stream-parses the page with lxml and stops as soon as the wanted product
+cards are complete, so only the top of the page is ever parsed. Each card is
+handed back as a small BeautifulSoup subtree for the store's field lookups.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+except ImportError:  # Optional dependency; falls back to a strained html.parser parse
+    etree = None
+
+
+# (tag name, attrs) pairs in BeautifulSoup find() form, e.g. ('div', {'class': 'product-item'});
+# an attr value of True only requires the attribute to be present
+CardSelector = Tuple[str, Dict]
+
+FEED_CHUNK_SIZE = 16 * 1024
+
+
+def _matches(element, selector: CardSelector) -> bool:
+    """Check an lxml element against a (tag, attrs) selector."""
+    tag, attrs = selector
+    if element.tag != tag:
+        return False
+    for name, expected in attrs.items():
+        value = element.get(name)
+        if value is None:
+            return False
+        if expected is True:
+            continue
+        if name == 'class':
+            if expected not in value.split():
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def _to_soup_card(element, selector: CardSelector):
+    """Wrap one lxml card element as a BeautifulSoup Tag."""
+    markup = etree.tostring(element, encoding='unicode', with_tail=False)
+    return BeautifulSoup(markup, 'lxml').find(selector[0], selector[1])
+
+
+def _find_cards_lxml(content: bytes, selectors: List[CardSelector], limit: int, encoding: str) -> List:
+    parser = etree.HTMLPullParser(events=('end',), tag=sorted({tag for tag, _ in selectors}),
+                                  encoding=encoding)
+    # Matches per selector, in priority order; the first selector wins like soup.find(a) or soup.find(b)
+    found: List[List] = [[] for _ in selectors]
+
+    def collect():
+        for _, element in parser.read_events():
+            for index, selector in enumerate(selectors):
+                if len(found[index]) < limit and _matches(element, selector):
+                    found[index].append(_to_soup_card(element, selector))
+                    break
+
+    for offset in range(0, len(content), FEED_CHUNK_SIZE):
+        parser.feed(content[offset:offset + FEED_CHUNK_SIZE])
+        collect()
+        # Early exit once the highest-priority selector has enough cards
+        if len(found[0]) >= limit:
+            break
+    else:
+        parser.close()
+        collect()
+
+    for cards in found:
+        if cards:
+            return cards
+    return []
+
+
+def _find_cards_soup(content: bytes, selectors: List[CardSelector], limit: int) -> List:
+    # Only keep the card tags (and their subtrees) in the parse tree
+    strainer = SoupStrainer(sorted({tag for tag, _ in selectors}))
+    soup = BeautifulSoup(content, 'html.parser', parse_only=strainer)
+    for tag, attrs in selectors:
+        cards = soup.find_all(tag, attrs, limit=limit)
+        if cards:
+            return cards
+    return []
+
+
+def find_product_cards(content: bytes, selectors: List[CardSelector], limit: int = 1,
+                       encoding: str = 'utf-8') -> List:
+    """
+    Find up to `limit` product cards on a search page.
+
+    Args:
+        content: Raw page HTML
+        selectors: Card selectors in priority order (first one that matches wins)
+        limit: Number of cards wanted
+        encoding: Page encoding used by the lxml parser
+
+    Returns:
+        List of BeautifulSoup Tags for the cards (empty if none found)
+    """
+    if isinstance(content, str):
+        content = content.encode(encoding)
+    if etree is not None:
+        return _find_cards_lxml(content, selectors, limit, encoding)
+    return _find_cards_soup(content, selectors, limit)
+
+
+def find_product_card(content: bytes, selectors: List[CardSelector]) -> Optional[object]:
+    """Find the first product card on a search page, or None."""
+    cards = find_product_cards(content, selectors, limit=1)
+    return cards[0] if cards else None
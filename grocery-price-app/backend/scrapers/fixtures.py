@@ -0,0 +1,68 @@
+"""
+Record raw store responses as fixtures for offline replay.
+With SCRAPER_RECORD_DIR set, every fetched search page is saved as
+<dir>/<store_slug>/<query_slug>.html; scripts/mock_store_server.py replays them.
+"""
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from scrapers.registry import store_slug
+from utils import normalize_product_name
+
+
+RECORD_DIR = os.getenv('SCRAPER_RECORD_DIR', '')
+
+
+def query_slug(product_name: str) -> str:
+    """File name key for a query, e.g. 'Amul Milk 1L!' -> 'amul_milk_1l'."""
+    return re.sub(r'\W+', '_', normalize_product_name(product_name)).strip('_')
+
+
+def fixture_path(fixtures_dir: str, store_name: str, product_name: str) -> str:
+    """Path of the fixture for one store and query."""
+    return os.path.join(fixtures_dir, store_slug(store_name), f'{query_slug(product_name)}.html')
+
+
+def is_recording() -> bool:
+    return bool(RECORD_DIR)
+
+
+def record_page(store_name: str, product_name: str, content: bytes):
+    """Save a fetched search page under SCRAPER_RECORD_DIR (no-op when not recording)."""
+    if not RECORD_DIR:
+        return
+    try:
+        path = fixture_path(RECORD_DIR, store_name, product_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a replaying server never sees half a page
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error recording {store_name} fixture: {str(e)}")
+
+
+def load_fixtures(fixtures_dir: str) -> Dict[Tuple[str, str], str]:
+    """Index recorded pages as {(store_slug, query_slug): path}."""
+    index = {}
+    if not fixtures_dir or not os.path.isdir(fixtures_dir):
+        return index
+    for store_dir in sorted(os.listdir(fixtures_dir)):
+        store_path = os.path.join(fixtures_dir, store_dir)
+        if not os.path.isdir(store_path):
+            continue
+        for name in os.listdir(store_path):
+            if name.endswith('.html'):
+                index[(store_dir, name[:-len('.html')])] = os.path.join(store_path, name)
+    return index
+
+
+def read_fixture(index: Dict[Tuple[str, str], str], store_name: str, product_name: str) -> Optional[bytes]:
+    """Recorded page for a store and query, or None."""
+    path = index.get((store_slug(store_name), query_slug(product_name)))
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
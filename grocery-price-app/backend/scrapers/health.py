@@ -0,0 +1,193 @@
+"""
+Per-store health tracking for the scrapers.
+Keeps a rolling window of request outcomes per store to drive a circuit
+breaker (closed / open / half-open), latency-adaptive timeouts based on the
+observed p95, and a bounded retry budget.
+"""
+import os
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+BREAKER_WINDOW = int(os.getenv('SCRAPER_BREAKER_WINDOW', 50))
+# Error rate over the window that opens the breaker
+BREAKER_ERROR_RATE = float(os.getenv('SCRAPER_BREAKER_ERROR_RATE', 0.5))
+# Requests needed in the window before the breaker may open
+BREAKER_MIN_REQUESTS = int(os.getenv('SCRAPER_BREAKER_MIN_REQUESTS', 10))
+# Seconds an open breaker waits before letting one probe request through
+BREAKER_COOLDOWN = float(os.getenv('SCRAPER_BREAKER_COOLDOWN', 30))
+
+TIMEOUT_MIN = float(os.getenv('SCRAPER_TIMEOUT_MIN', 1.0))
+TIMEOUT_MAX = float(os.getenv('SCRAPER_TIMEOUT_MAX', os.getenv('SCRAPER_REQUEST_TIMEOUT', 10.0)))
+# Timeout = observed p95 latency x this factor, clamped to [TIMEOUT_MIN, TIMEOUT_MAX]
+TIMEOUT_P95_FACTOR = float(os.getenv('SCRAPER_TIMEOUT_P95_FACTOR', 2.0))
+TIMEOUT_MIN_SAMPLES = int(os.getenv('SCRAPER_TIMEOUT_MIN_SAMPLES', 10))
+
+MAX_RETRIES = int(os.getenv('SCRAPER_MAX_RETRIES', 1))
+# Retries allowed as a fraction of recent requests (plus RETRY_BUDGET_MIN per window)
+RETRY_BUDGET_RATIO = float(os.getenv('SCRAPER_RETRY_BUDGET', 0.1))
+RETRY_BUDGET_MIN = int(os.getenv('SCRAPER_RETRY_BUDGET_MIN', 3))
+RETRY_BUDGET_WINDOW = 60.0
+RETRY_BACKOFF = float(os.getenv('SCRAPER_RETRY_BACKOFF', 0.2))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class StoreUnavailable(Exception):
+    """Raised when a store is skipped because its circuit breaker is open."""
+
+
+class StoreHealth:
+    """Rolling health window, circuit breaker and retry budget for one store."""
+
+    def __init__(self, store_name: str):
+        self.store_name = store_name
+        self._lock = threading.Lock()
+        # (succeeded, latency seconds) for the last BREAKER_WINDOW requests
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)
+        self._request_times = deque()
+        self._retry_times = deque()
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+        self.skipped = 0
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now (counts skipped requests)."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and now - self.opened_at >= BREAKER_COOLDOWN:
+                self.state = HALF_OPEN
+                self._probe_started_at = None
+
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported is given up on after TIMEOUT_MAX
+                if self._probe_started_at is None or now - self._probe_started_at > TIMEOUT_MAX:
+                    self._probe_started_at = now
+                    return True
+
+            self.skipped += 1
+            return False
+
+    def _record(self, succeeded: bool, latency: float):
+        now = time.monotonic()
+        self._outcomes.append((succeeded, latency))
+        self._request_times.append(now)
+        self._trim(now)
+
+        if self.state == HALF_OPEN:
+            self._probe_started_at = None
+            if succeeded:
+                # Start the recovered store with a clean window so old errors cannot reopen it
+                self.state = CLOSED
+                self.opened_at = None
+                self._outcomes.clear()
+                self._outcomes.append((succeeded, latency))
+            else:
+                self.state = OPEN
+                self.opened_at = now
+            return
+
+        if self.state == CLOSED and not succeeded and len(self._outcomes) >= BREAKER_MIN_REQUESTS:
+            errors = sum(1 for ok, _ in self._outcomes if not ok)
+            if errors / len(self._outcomes) >= BREAKER_ERROR_RATE:
+                self.state = OPEN
+                self.opened_at = now
+                print(f"Circuit breaker opened for {self.store_name}")
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._record(True, latency)
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._record(False, latency)
+
+    def release_probe(self):
+        """Forget an in-flight half-open probe that was cancelled."""
+        with self._lock:
+            self._probe_started_at = None
+
+    def _trim(self, now: float):
+        for times in (self._request_times, self._retry_times):
+            while times and now - times[0] > RETRY_BUDGET_WINDOW:
+                times.popleft()
+
+    def _p95(self) -> Optional[float]:
+        latencies = sorted(latency for ok, latency in self._outcomes if ok)
+        if len(latencies) < TIMEOUT_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def timeout(self) -> float:
+        """Request timeout from the observed p95 latency (TIMEOUT_MAX until there is data)."""
+        with self._lock:
+            p95 = self._p95()
+        if p95 is None:
+            return TIMEOUT_MAX
+        return min(TIMEOUT_MAX, max(TIMEOUT_MIN, p95 * TIMEOUT_P95_FACTOR))
+
+    def try_retry(self) -> bool:
+        """Take one retry from the budget; False if the budget is spent."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            budget = RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO * len(self._request_times)
+            if len(self._retry_times) >= budget:
+                return False
+            self._retry_times.append(now)
+            return True
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            samples = len(self._outcomes)
+            errors = sum(1 for ok, _ in self._outcomes if not ok)
+            p95 = self._p95()
+            state = self.state
+            opened_for = time.monotonic() - self.opened_at if self.opened_at is not None else None
+            retries = len(self._retry_times)
+            skipped = self.skipped
+        return {
+            'state': state,
+            'samples': samples,
+            'error_rate': round(errors / samples, 3) if samples else 0.0,
+            'p95_ms': round(p95 * 1000) if p95 is not None else None,
+            'timeout_seconds': round(self.timeout(), 2),
+            'open_for_seconds': round(opened_for, 1) if opened_for is not None else None,
+            'recent_retries': retries,
+            'skipped_requests': skipped,
+        }
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)."""
+    return random.uniform(0, RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+
+_health: Dict[str, StoreHealth] = {}
+_lock = threading.Lock()
+
+
+def get_store_health(store_name: str) -> StoreHealth:
+    """Get the health tracker for a store, creating it on first use."""
+    with _lock:
+        health = _health.get(store_name)
+        if health is None:
+            health = StoreHealth(store_name)
+            _health[store_name] = health
+        return health
+
+
+def get_health_report() -> Dict[str, Dict]:
+    """Breaker state, latency and error figures for every tracked store."""
+    with _lock:
+        health = dict(_health)
+    return {store: store_health.to_dict() for store, store_health in health.items()}
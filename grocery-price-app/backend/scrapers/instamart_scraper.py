@@ -1,10 +1,10 @@
 """
 Swiggy Instamart scraper for Indian grocery prices.
+Declarative store spec; the adapter registry compiles it into an extraction plan.
 """
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict, List, Optional
-import re
+
+from scrapers.registry import get_adapter
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -15,6 +15,42 @@ HEADERS = {
 }
 
 
+STORE_SPEC = {
+    'name': 'Swiggy Instamart',
+    'base_url': 'https://www.swiggy.com',
+    # {query} is the URL-quoted product name with spaces replaced by query_space
+    'search_path': '/instamart/search/{query}',
+    'query_space': '%20',
+    'headers': HEADERS,
+    # Product card selectors, in priority order
+    'card': [
+        ('div', {'class': 'ProductCard'}),
+        ('div', {'data-testid': 'product-card'}),
+    ],
+    # Price element selectors, in priority order
+    'price': [
+        ('span', {'class': 'price'}),
+        ('div', {'class': 'ProductCard__price'}),
+        ('span', {'data-testid': 'price'}),
+    ],
+    # Product name selectors (used when harvesting every card on a page); link text is
+    # not a name, so cards without one of these are not harvested
+    'product_name': [
+        ('div', {'class': 'ProductCard__name'}),
+    ],
+    'link': [
+        ('a', {'href': True}),
+    ],
+    # Characters stripped from the price text before float()
+    'price_strip': r'[^\d.]',
+    'out_of_stock': {
+        'selectors': [
+            ('span', {'class': 'out-of-stock'}),
+        ],
+    },
+}
+
+
 def scrape_instamart(product_name: str) -> Optional[Dict]:
     """
     Scrape Swiggy Instamart for product prices.
@@ -25,64 +61,9 @@ def scrape_instamart(product_name: str) -> Optional[Dict]:
     Returns:
         Dictionary with price information or None if not found
     """
-    try:
-        # Swiggy Instamart search URL
-        search_url = f"https://www.swiggy.com/instamart/search/{product_name.replace(' ', '%20')}"
-        
-        response = requests.get(search_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find first product result
-        product_card = soup.find('div', class_='ProductCard') or soup.find('div', {'data-testid': 'product-card'})
-        
-        if not product_card:
-            return None
-        
-        # Extract price
-        price_element = (
-            product_card.find('span', class_='price') or
-            product_card.find('div', class_='ProductCard__price') or
-            product_card.find('span', {'data-testid': 'price'})
-        )
-        
-        if not price_element:
-            return None
-        
-        price_text = price_element.get_text(strip=True)
-        # Extract numeric price
-        price = float(re.sub(r'[^\d.]', '', price_text))
-        
-        # Extract product link
-        link_element = product_card.find('a', href=True)
-        product_link = link_element['href'] if link_element else None
-        
-        if product_link and not product_link.startswith('http'):
-            product_link = f"https://www.swiggy.com{product_link}"
-        
-        # Check stock status
-        stock_element = product_card.find('span', class_='out-of-stock')
-        in_stock = stock_element is None
-        
-        # Ensure we always return a real URL
-        final_link = product_link if product_link and product_link.startswith('http') else search_url
-        
-        return {
-            'store': 'Swiggy Instamart',
-            'price': round(price, 2),
-            'currency': 'INR',
-            'link': final_link,
-            'in_stock': in_stock
-        }
-        
-    except Exception as e:
-        print(f"Error scraping Swiggy Instamart: {str(e)}")
-        return None
+    return get_adapter(STORE_SPEC['name']).scrape(product_name)
 
 
 def fetch_instamart_prices(product_name: str) -> List[Dict]:
     """Fetch prices from Swiggy Instamart."""
-    result = scrape_instamart(product_name)
-    return [result] if result else []
-
+    return get_adapter(STORE_SPEC['name']).fetch_prices(product_name)
@@ -2,17 +2,43 @@
 Price scraper module for Indian grocery stores.
 Aggregates prices from multiple real Indian grocery platforms.
 """
+import os
 import time
+import queue
 import random
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 
-# Import individual store scrapers
-from scrapers.bigbasket_scraper import fetch_bigbasket_prices
-from scrapers.zepto_scraper import fetch_zepto_prices
-from scrapers.instamart_scraper import fetch_instamart_prices
-from scrapers.jiomart_scraper import fetch_jiomart_prices
-from scrapers.amazonfresh_scraper import fetch_amazonfresh_prices
+# Store adapters (data-driven, loaded lazily by the registry)
+from scrapers.registry import StoreAdapter, get_enabled_adapters
+from scrapers.executor import get_scraper_executor
+from scrapers.cache import get_scraper_cache, FRESH, STALE
+from scrapers.single_flight import SingleFlight
+from scrapers.health import StoreUnavailable, MAX_RETRIES, get_store_health, retry_delay
+from scrapers.conditional import PageResponse, get_validator_store
+from scrapers.rate_limit import get_rate_limiter
+from scrapers import async_engine, fixtures
+from utils import normalize_product_name
+
+
+# Cards read per page when harvesting (see set_harvest_sink)
+HARVEST_MAX_CARDS = int(os.getenv('SCRAPER_HARVEST_MAX_CARDS', 40))
+
+# Store requests in flight at once for one basket, across all of its items
+BASKET_CONCURRENCY = int(os.getenv('SCRAPER_BASKET_CONCURRENCY', 10))
+
+# Called with every priced card of each scraped page; None disables harvesting
+_harvest_sink: Optional[Callable[[List[Dict]], None]] = None
+
+
+def set_harvest_sink(sink: Optional[Callable[[List[Dict]], None]]):
+    """
+    Harvest every product card on scraped pages, not just the first.
+    The sink receives each page's price dictionaries (with a 'name' key) on
+    the scraper event loop, so it must not block.
+    """
+    global _harvest_sink
+    _harvest_sink = sink
 
 
 # User agent rotation for better scraping success
@@ -23,61 +49,418 @@ USER_AGENTS = [
 ]
 
 
-def fetch_prices(product_name: str) -> List[Dict]:
+def _merge_results(prices_data: List[Dict]) -> List[Dict]:
+    """Keep one price per store and sort by price (lowest first)."""
+    # Remove duplicates by store name
+    unique_prices = {}
+    for price_info in prices_data:
+        store = price_info.get('store', '')
+        if store and store not in unique_prices:
+            unique_prices[store] = price_info
+
+    prices_data = list(unique_prices.values())
+
+    # Sort by price (lowest first)
+    prices_data.sort(key=lambda x: x.get('price', float('inf')))
+
+    return prices_data
+
+
+async def _fetch_page(adapter: StoreAdapter, search_url: str, timeout: float,
+                      headers: Dict) -> PageResponse:
+    """
+    Fetch a search page without holding a thread for the network wait.
+    Falls back to the blocking session on the shared pool if aiohttp is missing.
+    """
+    if not async_engine.is_available():
+        future = get_scraper_executor().submit(adapter.name, adapter.fetch_response, search_url, timeout, headers)
+        return await asyncio.wrap_future(future)
+    return await async_engine.fetch_page(search_url, headers=headers, timeout=timeout)
+
+
+async def _scrape_store_async(adapter: StoreAdapter, product_name: str) -> List[Dict]:
+    """
+    Scrape one store behind its circuit breaker.
+    The timeout follows the store's observed p95 latency, and failed fetches
+    are retried with jittered backoff while the store's retry budget allows.
+    Requests are conditional: a 304 or a byte-identical page reuses the last
+    parse instead of parsing again. Every attempt first takes a token from the
+    store host's rate limiter.
+
+    Raises:
+        StoreUnavailable: If the store's breaker is open
+        RateLimited: If no rate limit token is available within its max wait
+    """
+    health = get_store_health(adapter.name)
+    if not health.allow_request():
+        raise StoreUnavailable(f"{adapter.name} circuit breaker is open")
+
+    validators = get_validator_store()
+    search_url = adapter.build_search_url(product_name)
+    headers = validators.request_headers(adapter.name, search_url, adapter.headers)
+    limiter = get_rate_limiter()
+    attempt = 0
+    while True:
+        try:
+            await limiter.acquire_async(adapter.name, search_url)
+        except BaseException:
+            # Rate limited (or cancelled while queued): not a store failure
+            health.release_probe()
+            raise
+
+        start = time.monotonic()
+        try:
+            page = await _fetch_page(adapter, search_url, health.timeout(), headers)
+        except asyncio.CancelledError:
+            health.release_probe()
+            raise
+        except Exception:
+            health.record_failure(time.monotonic() - start)
+            attempt += 1
+            if attempt > MAX_RETRIES or not health.allow_request() or not health.try_retry():
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+
+        health.record_success(time.monotonic() - start)
+        unchanged = validators.unchanged_results(adapter.name, search_url, page)
+        if unchanged is not None:
+            # Price unchanged: the page (and so its cards) are the same as last time
+            return unchanged
+        if page.status == 304:
+            # Validators were evicted between request and response; nothing to parse
+            return []
+
+        content = page.body
+        if fixtures.is_recording():
+            await async_engine.run_parser(fixtures.record_page, adapter.name, product_name, content)
+
+        sink = _harvest_sink
+        if sink is None:
+            results = await async_engine.run_parser(adapter.parse, content, search_url)
+            validators.remember(search_url, page, results)
+            return results
+
+        # One parse serves both the search (first card) and the harvest (all cards)
+        cards = await async_engine.run_parser(adapter.parse, content, search_url, HARVEST_MAX_CARDS, True)
+        if cards:
+            try:
+                sink(cards)
+            except Exception as e:
+                print(f"Error harvesting {adapter.name} cards: {str(e)}")
+        results = [{key: value for key, value in card.items() if key != 'name'} for card in cards[:1]]
+        validators.remember(search_url, page, results)
+        return results
+
+
+# Concurrent searches for the same (store, normalized product) share one scrape
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide scrape coalescer."""
+    return _single_flight
+
+
+async def _scrape_and_cache(adapter: StoreAdapter, product_name: str, query: str) -> List[Dict]:
+    """Scrape one store and store the result in the scraper cache."""
+    results = await _scrape_store_async(adapter, product_name)
+    get_scraper_cache().set(adapter.name, query, results)
+    return results
+
+
+async def _fetch_store_cached(adapter: StoreAdapter, product_name: str) -> List[Dict]:
+    """
+    Serve a store result from the cache when possible.
+    Stale entries are returned immediately and refreshed in the background;
+    misses join any identical scrape already in flight.
+    """
+    cache = get_scraper_cache()
+    query = normalize_product_name(product_name)
+    key = (adapter.name, query)
+
+    def scrape():
+        return _scrape_and_cache(adapter, product_name, query)
+
+    results, state = cache.get(adapter.name, query)
+    if state == FRESH:
+        return results
+    if state == STALE:
+        if _single_flight.start(key, scrape):
+            cache.count_refresh()
+        return results
+
+    # Joiners share the leader's result; give each caller its own dicts
+    return [dict(result) for result in await _single_flight.do(key, scrape)]
+
+
+async def _fetch_store_live(adapter: StoreAdapter, product_name: str) -> List[Dict]:
+    """
+    Scrape a store now, ignoring cached results (the new result is still cached).
+    Joins an identical scrape already in flight.
+    """
+    query = normalize_product_name(product_name)
+
+    def scrape():
+        return _scrape_and_cache(adapter, product_name, query)
+
+    return [dict(result) for result in await _single_flight.do((adapter.name, query), scrape)]
+
+
+async def fetch_store_prices_async(adapter: StoreAdapter, product_name: str,
+                                   use_cache: bool = True) -> List[Dict]:
+    """
+    Fetch one store's prices for a product through the cache, coalescing and
+    circuit breaker (no overall search deadline). For batch jobs that pace each store.
+
+    Args:
+        adapter: Store to scrape
+        product_name: Name of the product to search for
+        use_cache: False to scrape now instead of serving a cached (possibly stale) result
+
+    Raises:
+        StoreUnavailable / request errors from the store
+    """
+    if not use_cache:
+        return await _fetch_store_live(adapter, product_name)
+    return await _fetch_store_cached(adapter, product_name)
+
+
+def _adapters_for(stores: Optional[List[str]] = None) -> List[StoreAdapter]:
+    """Enabled adapters, limited to the given store names if any."""
+    adapters = get_enabled_adapters()
+    if stores is None:
+        return adapters
+    return [adapter for adapter in adapters if adapter.name in stores]
+
+
+async def fetch_prices_async(product_name: str, unavailable: Optional[List[str]] = None,
+                             stores: Optional[List[str]] = None, use_cache: bool = True) -> List[Dict]:
+    """
+    Fetch prices for a product from all stores on one event loop.
+    Recent per-store results are served from the scraper cache and identical
+    concurrent searches share one scrape per store; stores that have not
+    answered by the scraper deadline are left out.
+
+    Args:
+        product_name: Name of the product to search for
+        unavailable: If given, names of stores skipped because their breaker is
+            open or they are rate limited are appended (callers may fall back to stored prices)
+        stores: Only scrape these stores (default every enabled store)
+        use_cache: False to scrape every store now instead of serving cached results
+
+    Returns:
+        List of dictionaries containing store, price, and link information
+    """
+    if not product_name or not product_name.strip():
+        return []
+
+    fetch = _fetch_store_cached if use_cache else _fetch_store_live
+    task_to_store = {
+        asyncio.ensure_future(fetch(adapter, product_name)): adapter.name
+        for adapter in _adapters_for(stores)
+    }
+    if not task_to_store:
+        return []
+
+    done, pending = await asyncio.wait(task_to_store, timeout=get_scraper_executor().deadline_seconds)
+
+    for task in pending:
+        task.cancel()
+        print(f"Timed out fetching prices from {task_to_store[task]}")
+
+    prices_data = []
+    for task in done:
+        try:
+            results = task.result()
+            if results:
+                prices_data.extend(results)
+        except StoreUnavailable as e:
+            print(f"Skipped {task_to_store[task]}: {str(e)}")
+            if unavailable is not None:
+                unavailable.append(task_to_store[task])
+        except Exception as e:
+            print(f"Error fetching prices from {task_to_store[task]}: {str(e)}")
+            # Continue with other stores even if one fails
+            continue
+
+    return _merge_results(prices_data)
+
+
+async def fetch_basket_prices_async(product_names: List[str],
+                                    concurrency: int = BASKET_CONCURRENCY,
+                                    stores: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[Dict]]:
+    """
+    Fetch prices for several products from all stores in one fan-out.
+    At most `concurrency` store scrapes run at once across the whole basket,
+    and stores that have not answered by the scraper deadline are left out.
+
+    Args:
+        product_names: Names of the products to search for
+        concurrency: Store scrapes allowed in flight at once
+        stores: {product name: only scrape these stores}; products left out
+            are scraped at every enabled store
+
+    Returns:
+        {product name: list of price dictionaries, lowest first}
+    """
+    names = list(dict.fromkeys(name for name in product_names if name and name.strip()))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(adapter: StoreAdapter, product_name: str) -> List[Dict]:
+        async with semaphore:
+            return await _fetch_store_cached(adapter, product_name)
+
+    stores = stores or {}
+    task_to_item = {
+        asyncio.ensure_future(fetch(adapter, name)): (name, adapter.name)
+        for name in names
+        for adapter in _adapters_for(stores.get(name))
+    }
+    if not task_to_item:
+        return {}
+
+    done, pending = await asyncio.wait(task_to_item, timeout=get_scraper_executor().deadline_seconds)
+
+    for task in pending:
+        task.cancel()
+        print(f"Timed out fetching {task_to_item[task][0]} prices from {task_to_item[task][1]}")
+
+    prices_data = {name: [] for name in names}
+    for task in done:
+        name, store = task_to_item[task]
+        try:
+            prices_data[name].extend(task.result() or [])
+        except Exception as e:
+            print(f"Error fetching {name} prices from {store}: {str(e)}")
+
+    return {name: _merge_results(prices) for name, prices in prices_data.items()}
+
+
+def fetch_basket_prices(product_names: List[str],
+                        stores: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[Dict]]:
+    """
+    Synchronous wrapper over fetch_basket_prices_async, run on the shared
+    scraper event loop.
+    """
+    if not product_names:
+        return {}
+
+    return async_engine.run_coroutine(fetch_basket_prices_async(product_names, stores=stores))
+
+
+async def _stream_prices_async(product_name: str,
+                               on_store: Callable[[str, List[Dict], Optional[str]], None],
+                               stores: Optional[List[str]] = None,
+                               unavailable: Optional[List[str]] = None):
+    """
+    Scrape the stores and call on_store(store, prices, error) as each one finishes.
+    Stores still running at the scraper deadline are reported as timed out.
+    """
+    def report(task: asyncio.Task, store: str):
+        if task.cancelled():
+            on_store(store, [], 'Timed out')
+        elif task.exception() is not None:
+            if unavailable is not None and isinstance(task.exception(), StoreUnavailable):
+                unavailable.append(store)
+            on_store(store, [], str(task.exception()))
+        else:
+            on_store(store, task.result() or [], None)
+
+    tasks = []
+    for adapter in _adapters_for(stores):
+        task = asyncio.ensure_future(_fetch_store_cached(adapter, product_name))
+        task.add_done_callback(lambda done, store=adapter.name: report(done, store))
+        tasks.append(task)
+
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=get_scraper_executor().deadline_seconds)
+        for task in pending:
+            task.cancel()
+        # Let the cancellations run their done callbacks
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def iter_store_prices(product_name: str, stores: Optional[List[str]] = None,
+                      unavailable: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Dict], Optional[str]]]:
+    """
+    Fetch prices from all stores, yielding each store's result as soon as it arrives.
+    Fastest stores come first; the iterator ends once every store has answered
+    or the scraper deadline has passed.
+
+    Args:
+        product_name: Name of the product to search for
+        stores: Only scrape these stores (default every enabled store)
+        unavailable: Collects stores skipped by their breaker or rate limit (see fetch_prices_async)
+
+    Yields:
+        (store name, list of price dictionaries, error message or None)
+    """
+    if not product_name or not product_name.strip():
+        return
+
+    updates = queue.Queue()
+    done = object()
+
+    async def stream():
+        try:
+            await _stream_prices_async(product_name, lambda *update: updates.put(update), stores, unavailable)
+        finally:
+            updates.put(done)
+
+    future = async_engine.submit_coroutine(stream())
+    while True:
+        update = updates.get()
+        if update is done:
+            break
+        yield update
+    future.result()
+
+
+def fetch_prices(product_name: str, unavailable: Optional[List[str]] = None,
+                 stores: Optional[List[str]] = None, use_cache: bool = True) -> List[Dict]:
     """
     Fetch prices for a product from multiple Indian grocery stores.
-    Uses parallel scraping for better performance.
+    Thin synchronous wrapper over fetch_prices_async, run on the shared
+    scraper event loop.
     Handles errors gracefully and returns empty list on failure.
-    
+
+    Args:
+        product_name: Name of the product to search for
+        unavailable: Collects stores skipped by their breaker or rate limit (see fetch_prices_async)
+        stores: Only scrape these stores (default every enabled store)
+        use_cache: False to scrape every store now instead of serving cached results
+
+    Returns:
+        List of dictionaries containing store, price, and link information
+    """
+    if not product_name or not product_name.strip():
+        return []
+
+    return async_engine.run_coroutine(fetch_prices_async(product_name, unavailable, stores, use_cache))
+
+
+def fetch_prices_threaded(product_name: str) -> List[Dict]:
+    """
+    Fetch prices with one pool thread per store (blocking requests sessions).
+    Bypasses the scraper cache; kept for comparison benchmarks.
+
     Args:
         product_name: Name of the product to search for
-        
+
     Returns:
         List of dictionaries containing store, price, and link information
     """
     if not product_name or not product_name.strip():
         return []
-    
+
+    scrapers = [(adapter.name, adapter.fetch_prices) for adapter in get_enabled_adapters()]
+
     prices_data = []
-    
-    # Define all scrapers (ONLY Indian stores)
-    scrapers = [
-        ('BigBasket', fetch_bigbasket_prices),
-        ('Zepto', fetch_zepto_prices),
-        ('Swiggy Instamart', fetch_instamart_prices),
-        ('JioMart', fetch_jiomart_prices),
-        ('Amazon Fresh', fetch_amazonfresh_prices),
-    ]
-    
-    # Use ThreadPoolExecutor for parallel scraping
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_store = {
-            executor.submit(scraper_func, product_name): store_name
-            for store_name, scraper_func in scrapers
-        }
-        
-        for future in as_completed(future_to_store):
-            store_name = future_to_store[future]
-            try:
-                results = future.result(timeout=15)  # 15 second timeout per store
-                if results:
-                    prices_data.extend(results)
-            except Exception as e:
-                print(f"Error fetching prices from {store_name}: {str(e)}")
-                # Continue with other stores even if one fails
-                continue
-    
-    # Remove duplicates by store name
-    unique_prices = {}
-    for price_info in prices_data:
-        store = price_info.get('store', '')
-        if store and store not in unique_prices:
-            unique_prices[store] = price_info
-    
-    prices_data = list(unique_prices.values())
-    
-    # Sort by price (lowest first)
-    prices_data.sort(key=lambda x: x.get('price', float('inf')))
-    
-    return prices_data
+    # Run on the shared scraper pool; stores that miss the deadline are dropped
+    results = get_scraper_executor().run_stores(scrapers, product_name)
+    for store_results in results.values():
+        if store_results:
+            prices_data.extend(store_results)
 
+    return _merge_results(prices_data)
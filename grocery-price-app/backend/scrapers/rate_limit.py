@@ -0,0 +1,226 @@
+"""
+Per-host token-bucket rate limiting for store requests.
+Every scraper path (search, stream, refresh, bulk) takes a token before it
+fetches. Buckets live in memory, or in a SQLite file shared by all worker
+processes when SCRAPER_RATE_LIMIT_DB is set. A request that would have to
+queue longer than its deadline is rejected instead of waiting.
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from scrapers.health import StoreUnavailable
+
+
+# Requests per second allowed against one store host (0 disables limiting)
+RATE_LIMIT = float(os.getenv('SCRAPER_RATE_LIMIT', 10))
+# Requests a host may receive back-to-back after being idle
+RATE_LIMIT_BURST = float(os.getenv('SCRAPER_RATE_LIMIT_BURST', 20))
+# Per-store (or per-host) overrides, e.g. "Zepto=4,JioMart=2"
+RATE_LIMITS = os.getenv('SCRAPER_RATE_LIMITS', '')
+# Longest a request may queue for a token before it is rejected
+RATE_LIMIT_MAX_WAIT = float(os.getenv('SCRAPER_RATE_LIMIT_MAX_WAIT', 2.0))
+# SQLite file holding the buckets, shared across processes (empty = per process)
+RATE_LIMIT_DB = os.getenv('SCRAPER_RATE_LIMIT_DB', '')
+
+
+class RateLimited(StoreUnavailable):
+    """Raised when a store request would wait longer than its deadline for a token."""
+
+
+def _parse_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            key, rate = item.split('=', 1)
+            rates[key.strip()] = float(rate)
+    return rates
+
+
+def _take(tokens: float, updated: float, now: float, rate: float, burst: float,
+          max_wait: float) -> Tuple[float, Optional[float]]:
+    """
+    Refill a bucket and try to reserve one token.
+    Tokens may go negative: that is the queue of requests already waiting.
+
+    Returns:
+        (tokens left, seconds to wait) — wait is None if it would exceed max_wait
+    """
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    wait = max(0.0, (1.0 - tokens) / rate)
+    if wait > max_wait:
+        return tokens, None
+    return tokens - 1.0, wait
+
+
+class _MemoryBuckets:
+    """Buckets shared by the threads and event loop of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def reserve(self, host: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(host, (burst, now))
+            tokens, wait = _take(tokens, updated, now, rate, burst, max_wait)
+            self._buckets[host] = (tokens, now)
+            return wait
+
+
+class _SQLiteBuckets:
+    """Buckets in a SQLite file, so every worker process shares one budget per host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_buckets '
+                         '(host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, host: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        conn = self._connect()
+        # Wall clock: the buckets are compared across processes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE host = ?', (host,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, wait = _take(tokens, updated, now, rate, burst, max_wait)
+            conn.execute('INSERT INTO rate_buckets (host, tokens, updated) VALUES (?, ?, ?) '
+                         'ON CONFLICT(host) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                         (host, tokens, now))
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class HostRateLimiter:
+    """Token bucket per store host with deadline-bounded queueing."""
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: float = RATE_LIMIT_BURST,
+                 overrides: Optional[Dict[str, float]] = None, db_path: str = RATE_LIMIT_DB,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.overrides = dict(overrides if overrides is not None else _parse_rates(RATE_LIMITS))
+        self.shared = bool(db_path)
+        self._buckets = _MemoryBuckets()
+        if db_path:
+            try:
+                self._buckets = _SQLiteBuckets(db_path)
+            except Exception as e:
+                self.shared = False
+                print(f"Error opening rate limit database {db_path}, limiting per process: {str(e)}")
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def _rate_for(self, store_name: str, host: str) -> float:
+        return self.overrides.get(store_name, self.overrides.get(host, self.rate))
+
+    def _count(self, host: str, wait: Optional[float]):
+        with self._lock:
+            stats = self._stats.setdefault(host, {'granted': 0, 'queued': 0, 'wait_seconds': 0.0, 'rejected': 0})
+            if wait is None:
+                stats['rejected'] += 1
+                return
+            stats['granted'] += 1
+            if wait > 0:
+                stats['queued'] += 1
+                stats['wait_seconds'] += wait
+
+    def reserve(self, store_name: str, url: str, max_wait: Optional[float] = None) -> float:
+        """
+        Reserve a token for a request to the URL's host.
+
+        Returns:
+            Seconds to wait before sending the request (0 if a token was free)
+
+        Raises:
+            RateLimited: If the token would not be available within max_wait
+                (default: the limiter's max_wait)
+        """
+        if max_wait is None:
+            max_wait = self.max_wait
+        host = urlsplit(url).netloc
+        rate = self._rate_for(store_name, host)
+        if rate <= 0:
+            return 0.0
+        try:
+            wait = self._buckets.reserve(host, rate, max(self.burst, 1.0), max_wait)
+        except Exception as e:
+            # A broken shared store must not stop scraping
+            print(f"Error reserving rate limit token for {host}: {str(e)}")
+            return 0.0
+        self._count(host, wait)
+        if wait is None:
+            raise RateLimited(f"{store_name} rate limit: no token within {max_wait:.1f}s")
+        return wait
+
+    def acquire(self, store_name: str, url: str, max_wait: Optional[float] = None):
+        """Block the calling thread until a token is available (see reserve)."""
+        wait = self.reserve(store_name, url, max_wait)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, store_name: str, url: str, max_wait: Optional[float] = None):
+        """Wait on the event loop until a token is available (see reserve)."""
+        if self.shared:
+            # SQLite may block on another process's lock; keep it off the loop
+            wait = await asyncio.get_running_loop().run_in_executor(None, self.reserve, store_name, url, max_wait)
+        else:
+            wait = self.reserve(store_name, url, max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hosts = {host: dict(stats, wait_seconds=round(stats['wait_seconds'], 3))
+                     for host, stats in self._stats.items()}
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'overrides': self.overrides,
+            'max_wait': self.max_wait,
+            'shared': self.shared,
+            'hosts': hosts,
+        }
+
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Get the process-wide store rate limiter."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = HostRateLimiter()
+    return _limiter
+
+
+def set_rate_limiter(limiter: HostRateLimiter):
+    """
+    Replace the process-wide limiter, e.g. HostRateLimiter(rate=0) for benchmarks
+    or a long max_wait for batch jobs that should queue rather than give up.
+    """
+    global _limiter
+    _limiter = limiter
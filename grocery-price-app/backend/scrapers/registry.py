@@ -0,0 +1,319 @@
+"""
+Store adapter registry for the price scrapers.
+Each store is described by data (URL template, selector chains, price regex,
+stock markers) and compiled once into a reusable extraction plan. Adapters are
+loaded lazily; stores can be added or disabled through configuration.
+"""
+import os
+import re
+import json
+import importlib
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from bs4 import SoupStrainer
+
+from scrapers.conditional import PageResponse
+from scrapers.extraction import find_product_cards
+from scrapers.rate_limit import get_rate_limiter
+from scrapers.session_manager import get_session
+
+
+# Built-in stores (ONLY Indian stores): display name -> module holding its STORE_SPEC
+BUILTIN_ADAPTERS = {
+    'BigBasket': 'scrapers.bigbasket_scraper',
+    'Zepto': 'scrapers.zepto_scraper',
+    'Swiggy Instamart': 'scrapers.instamart_scraper',
+    'JioMart': 'scrapers.jiomart_scraper',
+    'Amazon Fresh': 'scrapers.amazonfresh_scraper',
+}
+
+# JSON file with extra or overriding store specs (a list of STORE_SPEC-style objects)
+ADAPTERS_FILE = os.getenv('SCRAPER_ADAPTERS_FILE', '')
+# Comma-separated store names to skip, e.g. "JioMart,Amazon Fresh"
+DISABLED_STORES = os.getenv('SCRAPER_DISABLED_STORES', '')
+# Point every store at one mock server, as <SCRAPER_MOCK_URL>/<store_slug> (see scripts/mock_store_server.py).
+# A single store can be redirected with SCRAPER_BASE_URL_<STORE_SLUG>, e.g. SCRAPER_BASE_URL_ZEPTO.
+MOCK_URL = os.getenv('SCRAPER_MOCK_URL', '').rstrip('/')
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-IN,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+DEFAULT_REQUEST_TIMEOUT = 10
+
+
+def _strainers(selectors) -> List[SoupStrainer]:
+    """Compile [tag, attrs] selector pairs into reusable SoupStrainers."""
+    return [SoupStrainer(tag, dict(attrs)) for tag, attrs in selectors]
+
+
+def _first(card, strainers: List[SoupStrainer]):
+    for strainer in strainers:
+        element = card.find(strainer)
+        if element is not None:
+            return element
+    return None
+
+
+class ExtractionPlan:
+    """
+    Compiled extraction steps for one store's search page.
+
+    Built once from a store spec; parse() then only runs precompiled
+    strainers and regexes against the product cards.
+    """
+
+    def __init__(self, spec: Dict):
+        self.card_selectors = [(tag, dict(attrs)) for tag, attrs in spec['card']]
+        self.price = _strainers(spec['price'])
+        self.link = _strainers(spec.get('link', [('a', {'href': True})]))
+        self.product_name = _strainers(spec.get('product_name', []))
+        self.price_strip = re.compile(spec.get('price_strip', r'[^\d.]'))
+        stock = spec.get('out_of_stock', {})
+        self.out_of_stock = _strainers(stock.get('selectors', []))
+        # If set, an out-of-stock element only counts when its text contains this marker
+        self.out_of_stock_text = (stock.get('text') or '').lower() or None
+
+    def _in_stock(self, card) -> bool:
+        element = _first(card, self.out_of_stock)
+        if element is None:
+            return True
+        if self.out_of_stock_text is None:
+            return False
+        return self.out_of_stock_text not in element.get_text().lower()
+
+    def extract(self, card, store_name: str, base_url: str, search_url: str,
+                with_name: bool = False) -> Optional[Dict]:
+        """
+        Extract price information from one product card, or None if it has no price.
+        With with_name, the card's product name is added as 'name' (None if not found).
+        """
+        price_element = _first(card, self.price)
+        if price_element is None:
+            return None
+
+        # Extract numeric price
+        price = float(self.price_strip.sub('', price_element.get_text(strip=True)))
+
+        # Extract product link
+        link_element = _first(card, self.link)
+        product_link = link_element['href'] if link_element else None
+        if product_link and not product_link.startswith('http'):
+            product_link = f"{base_url}{product_link}"
+
+        # Ensure we always return a real URL
+        final_link = product_link if product_link and product_link.startswith('http') else search_url
+
+        result = {
+            'store': store_name,
+            'price': round(price, 2),
+            'currency': 'INR',
+            'link': final_link,
+            'in_stock': self._in_stock(card)
+        }
+
+        if with_name:
+            name_element = _first(card, self.product_name)
+            name = name_element.get_text(' ', strip=True) if name_element else ''
+            result['name'] = name or None
+
+        return result
+
+
+class StoreAdapter:
+    """A configured store: URL building, fetching and page parsing."""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.name = spec['name']
+        self.base_url = _base_url_for(self.name, spec['base_url'])
+        self.search_path = spec['search_path']
+        self.query_space = spec.get('query_space', '%20')
+        self.headers = dict(spec.get('headers') or DEFAULT_HEADERS)
+        self.timeout = spec.get('timeout', DEFAULT_REQUEST_TIMEOUT)
+        self.plan = ExtractionPlan(spec)
+
+    def build_search_url(self, product_name: str) -> str:
+        """Build the store's search URL for a product."""
+        query = quote(product_name, safe=' ').replace(' ', self.query_space)
+        return f"{self.base_url}{self.search_path.format(query=query)}"
+
+    def parse(self, content: bytes, search_url: str, limit: int = 1, with_names: bool = False) -> List[Dict]:
+        """
+        Extract prices from a search results page.
+
+        Args:
+            content: Raw HTML of the search results page
+            search_url: URL the page was fetched from (fallback product link)
+            limit: Number of product cards to read
+            with_names: Also extract each card's product name ('name')
+
+        Returns:
+            List of price dictionaries (empty if nothing found); cards that
+            cannot be read (e.g. "Out of stock" as the price) are skipped
+        """
+        results = []
+        for card in find_product_cards(content, self.plan.card_selectors, limit=limit):
+            try:
+                result = self.plan.extract(card, self.name, self.base_url, search_url, with_name=with_names)
+            except (ValueError, AttributeError) as e:
+                print(f"Skipping unreadable {self.name} product card: {str(e)}")
+                continue
+            if result:
+                results.append(result)
+        return results
+
+    def parse_first(self, content: bytes, search_url: str) -> Optional[Dict]:
+        """Extract the first product's price from a search page, or None."""
+        results = self.parse(content, search_url, limit=1)
+        return results[0] if results else None
+
+    def fetch_page(self, search_url: str, timeout: Optional[float] = None) -> bytes:
+        """
+        GET a search page with the pooled blocking session.
+
+        Raises:
+            requests.RequestException on failure or non-2xx status
+        """
+        response = get_session(self.name).get(search_url, headers=self.headers,
+                                              timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def fetch_response(self, search_url: str, timeout: Optional[float] = None,
+                       headers: Optional[Dict] = None) -> PageResponse:
+        """
+        GET a search page with the pooled blocking session, keeping status and
+        transfer details (a 304 Not Modified is returned, not raised).
+
+        Raises:
+            requests.RequestException on failure or 4xx/5xx status
+        """
+        response = get_session(self.name).get(search_url, headers=headers or self.headers,
+                                              timeout=timeout or self.timeout)
+        response.raise_for_status()
+        body = response.content
+        try:
+            # Bytes read from the socket, before urllib3 decompressed them
+            wire_bytes = response.raw.tell() or None
+        except Exception:
+            wire_bytes = None
+        return PageResponse(response.status_code, body, response.headers, wire_bytes)
+
+    def scrape(self, product_name: str) -> Optional[Dict]:
+        """
+        Scrape the store for a product with the pooled blocking session.
+
+        Returns:
+            Dictionary with price information or None if not found
+        """
+        try:
+            from scrapers.fixtures import record_page
+            search_url = self.build_search_url(product_name)
+            get_rate_limiter().acquire(self.name, search_url)
+            content = self.fetch_page(search_url)
+            record_page(self.name, product_name, content)
+            return self.parse_first(content, search_url)
+
+        except Exception as e:
+            print(f"Error scraping {self.name}: {str(e)}")
+            return None
+
+    def fetch_prices(self, product_name: str) -> List[Dict]:
+        """Fetch prices from the store as a list (empty if not found)."""
+        result = self.scrape(product_name)
+        return [result] if result else []
+
+
+_adapters: Dict[str, StoreAdapter] = {}
+_extra_specs: Optional[Dict[str, Dict]] = None
+_lock = threading.RLock()
+
+
+def _load_extra_specs() -> Dict[str, Dict]:
+    """Read store specs from SCRAPER_ADAPTERS_FILE (once)."""
+    global _extra_specs
+    if _extra_specs is None:
+        specs = {}
+        if ADAPTERS_FILE:
+            try:
+                with open(ADAPTERS_FILE, encoding='utf-8') as f:
+                    for spec in json.load(f):
+                        specs[spec['name']] = spec
+            except Exception as e:
+                print(f"Error loading scraper adapters from {ADAPTERS_FILE}: {str(e)}")
+        _extra_specs = specs
+    return _extra_specs
+
+
+def _load_spec(store_name: str) -> Dict:
+    extra = _load_extra_specs()
+    if store_name in extra:
+        return extra[store_name]
+    module = importlib.import_module(BUILTIN_ADAPTERS[store_name])
+    return module.STORE_SPEC
+
+
+def store_slug(store_name: str) -> str:
+    """File/env friendly store key, e.g. 'Swiggy Instamart' -> 'swiggy_instamart'."""
+    return re.sub(r'[^a-z0-9]+', '_', store_name.lower()).strip('_')
+
+
+def _base_url_for(store_name: str, default: str) -> str:
+    """Store base URL after SCRAPER_BASE_URL_<SLUG> / SCRAPER_MOCK_URL overrides."""
+    slug = store_slug(store_name)
+    override = os.getenv(f'SCRAPER_BASE_URL_{slug.upper()}')
+    if override:
+        return override.rstrip('/')
+    if MOCK_URL:
+        return f'{MOCK_URL}/{slug}'
+    return default
+
+
+def set_base_url(store_name: str, base_url: str):
+    """Point a store at another host at runtime (e.g. a mock server in benchmarks)."""
+    get_adapter(store_name).base_url = base_url.rstrip('/')
+
+
+def store_names() -> List[str]:
+    """All configured store names (built-in first, then extra), enabled or not."""
+    names = list(BUILTIN_ADAPTERS)
+    names.extend(name for name in _load_extra_specs() if name not in BUILTIN_ADAPTERS)
+    return names
+
+
+def enabled_store_names() -> List[str]:
+    """Configured store names minus SCRAPER_DISABLED_STORES."""
+    disabled = {name.strip() for name in DISABLED_STORES.split(',') if name.strip()}
+    return [name for name in store_names() if name not in disabled]
+
+
+def get_adapter(store_name: str) -> StoreAdapter:
+    """
+    Get a store adapter, importing and compiling its spec on first use.
+
+    Raises:
+        KeyError: If the store is not configured
+    """
+    adapter = _adapters.get(store_name)
+    if adapter is not None:
+        return adapter
+
+    with _lock:
+        adapter = _adapters.get(store_name)
+        if adapter is None:
+            if store_name not in BUILTIN_ADAPTERS and store_name not in _load_extra_specs():
+                raise KeyError(f"Unknown store: {store_name}")
+            adapter = StoreAdapter(_load_spec(store_name))
+            _adapters[store_name] = adapter
+        return adapter
+
+
+def get_enabled_adapters() -> List[StoreAdapter]:
+    """Adapters for every enabled store, in configuration order."""
+    return [get_adapter(name) for name in enabled_store_names()]
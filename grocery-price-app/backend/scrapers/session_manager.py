@@ -0,0 +1,150 @@
+"""
+Process-wide HTTP session manager for the store scrapers.
+Keeps one pooled, keep-alive requests.Session per store so repeated searches
+reuse TCP/TLS connections instead of paying a new handshake every time.
+"""
+import os
+import atexit
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# Number of distinct hosts kept per store session (store + CDN redirects)
+POOL_CONNECTIONS = int(os.getenv('SCRAPER_POOL_CONNECTIONS', 4))
+# Keep-alive connections kept open per host; should cover the scraper workers
+POOL_MAXSIZE = int(os.getenv('SCRAPER_POOL_MAXSIZE', 16))
+# Block workers when the pool is exhausted instead of opening throwaway connections
+POOL_BLOCK = os.getenv('SCRAPER_POOL_BLOCK', 'False').lower() == 'true'
+
+
+class ConnectionStats:
+    """Thread-safe request / connection counters for one store."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            requests_sent = self.requests
+            new_connections = self.new_connections
+        reused = max(0, requests_sent - new_connections)
+        return {
+            'requests': requests_sent,
+            'new_connections': new_connections,
+            'reused_connections': reused,
+            'reuse_ratio': round(reused / requests_sent, 3) if requests_sent else 0.0,
+        }
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and freshly opened connections."""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        # Must be set before HTTPAdapter.__init__ builds the pool manager
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.record_connection()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.record_connection()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, ConnectionStats] = {}
+_lock = threading.Lock()
+
+
+def _build_session(stats: ConnectionStats) -> requests.Session:
+    """Create a keep-alive session with a connection pool sized for the scraper workers."""
+    session = requests.Session()
+    adapter = _CountingAdapter(
+        stats,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(store_name: str) -> requests.Session:
+    """
+    Get the shared session for a store, creating it on first use.
+
+    The session is shared by every scraper worker thread. Only ``get`` is
+    called on it concurrently; urllib3's connection pool is thread-safe, so
+    each worker checks out its own connection and returns it for reuse.
+
+    Args:
+        store_name: Display name of the store (e.g. 'BigBasket')
+
+    Returns:
+        Pooled requests.Session for that store
+    """
+    session = _sessions.get(store_name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(store_name)
+        if session is None:
+            stats = _stats.setdefault(store_name, ConnectionStats())
+            session = _build_session(stats)
+            _sessions[store_name] = session
+        return session
+
+
+def get_session_stats() -> Dict[str, Dict]:
+    """Return connection-reuse counters for every store session."""
+    with _lock:
+        stats = dict(_stats)
+    return {store: store_stats.to_dict() for store, store_stats in stats.items()}
+
+
+def close_sessions():
+    """Close all pooled sessions (called on interpreter shutdown)."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        try:
+            session.close()
+        except Exception as e:
+            print(f"Error closing scraper session: {str(e)}")
+
+
+atexit.register(close_sessions)
@@ -0,0 +1,72 @@
+"""
+Single-flight coalescing for concurrent store scrapes.
+Concurrent searches for the same (store, normalized product) share one
+in-flight scrape and all receive its result.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one running task."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {'started': 0, 'deduplicated': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved; callers that timed out never read it
+        if not task.cancelled():
+            task.exception()
+
+    def _join_or_start(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """Return (task, started) for the key on the running loop."""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self._count('deduplicated')
+            return task, False
+
+        task = loop.create_task(factory())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self._count('started')
+        return task, True
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """
+        Run factory() once per key at a time and return its result.
+
+        The shared task is shielded, so a caller that is cancelled (e.g. by
+        its search deadline) does not cancel the scrape for the others.
+        """
+        task, _ = self._join_or_start(key, factory)
+        return await asyncio.shield(task)
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable]) -> bool:
+        """
+        Start factory() in the background unless the key is already in flight.
+        Must be called from a running event loop.
+
+        Returns:
+            True if a new task was started
+        """
+        _, started = self._join_or_start(key, factory)
+        return started
+
+    def stats(self) -> Dict:
+        """Return started/deduplicated counters and the number of calls in flight."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        calls = stats['started'] + stats['deduplicated']
+        stats['dedup_ratio'] = round(stats['deduplicated'] / calls, 3) if calls else 0.0
+        return stats
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark for search-page parsing: full html.parser parse (before) vs the
+lxml streaming card extractor with early exit (after), per store.
+
+Uses saved pages from --fixtures-dir (files named <store_slug>.html, e.g.
+swiggy_instamart.html) when present, otherwise synthesizes a realistic-size page per
+store. Memory is the Python-heap peak from tracemalloc; libxml2's own C buffers
+are not included.
+
+Usage:
+    python scripts/benchmark_parsing.py
+    python scripts/benchmark_parsing.py --fixtures-dir fixtures/pages --runs 50
+"""
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+from scrapers.registry import get_enabled_adapters, store_slug
+from scrapers.extraction import find_product_card
+from scripts.mock_store_server import synthesize_page
+
+def parse_before(content: bytes, selectors):
+    """Original approach: full html.parser tree, then find() per selector."""
+    soup = BeautifulSoup(content, 'html.parser')
+    for tag, attrs in selectors:
+        card = soup.find(tag, attrs)
+        if card:
+            return card
+    return None
+
+
+def measure(func, content, selectors, runs: int):
+    """Return (mean ms, peak KiB, card text) for one parse function."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        card = func(content, selectors)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+
+    tracemalloc.start()
+    func(content, selectors)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed_ms, peak / 1024, card.get_text(strip=True) if card else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark search-page parsing per store.')
+    parser.add_argument('--fixtures-dir', help='Directory with saved <store>.html pages')
+    parser.add_argument('--cards', type=int, default=40, help='Cards per synthesized page')
+    parser.add_argument('--runs', type=int, default=20, help='Parses per measurement')
+    args = parser.parse_args()
+
+    print(f"{'store':<18} {'page KiB':>9} {'before ms':>10} {'after ms':>9} {'speedup':>8} "
+          f"{'before KiB':>11} {'after KiB':>10}  same card")
+
+    for adapter in get_enabled_adapters():
+        key = store_slug(adapter.name)
+        content = None
+        if args.fixtures_dir:
+            path = os.path.join(args.fixtures_dir, f'{key}.html')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    content = f.read()
+        if content is None:
+            content = synthesize_page(key, args.cards)
+
+        selectors = adapter.plan.card_selectors
+        before_ms, before_kib, before_card = measure(parse_before, content, selectors, args.runs)
+        after_ms, after_kib, after_card = measure(find_product_card, content, selectors, args.runs)
+
+        print(f"{adapter.name:<18} {len(content) / 1024:>9.0f} {before_ms:>10.2f} {after_ms:>9.2f} "
+              f"{before_ms / after_ms if after_ms else 0:>7.1f}x {before_kib:>11.0f} {after_kib:>10.0f}  "
+              f"{'yes' if before_card == after_card else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
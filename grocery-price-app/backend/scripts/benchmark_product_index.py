@@ -0,0 +1,124 @@
+"""
+Benchmark product-name resolution: the old LIKE 'x%' / LIKE '%x%' queries
+(before) vs the trigram product index (after), at several catalog sizes.
+
+Each size gets a fresh database filled with synthetic product names. Queries
+are a mix of names that match (whole names, brand + item, single words) and
+names that match nothing, which is where the LIKE '%x%' scan hurts most.
+
+Usage:
+    python scripts/benchmark_product_index.py
+    python scripts/benchmark_product_index.py --sizes 10000,100000 --queries 500
+    python scripts/benchmark_product_index.py --database-url postgresql://localhost/bench
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from models import Category, Product
+from product_index import ensure_product_index, match_product_ids, match_product_ids_like
+
+BRANDS = ['amul', 'tata', 'aashirvaad', 'fortune', 'britannia', 'nestle', 'mother dairy', 'haldiram',
+          'mtr', 'everest', 'patanjali', 'dabur', 'parle', 'kelloggs', 'saffola', 'india gate']
+ITEMS = ['milk', 'butter', 'paneer', 'curd', 'ghee', 'atta', 'basmati rice', 'toor dal', 'moong dal',
+         'sugar', 'salt', 'sunflower oil', 'mustard oil', 'tea', 'coffee', 'biscuits', 'bread', 'cornflakes',
+         'honey', 'turmeric powder', 'chilli powder', 'garam masala', 'poha', 'besan', 'namkeen', 'cheese']
+VARIANTS = ['', 'organic', 'premium', 'classic', 'gold', 'lite', 'fresh', 'toned', 'whole wheat', 'family pack']
+SIZES = ['100g', '200g', '250g', '500g', '1kg', '2kg', '5kg', '500ml', '1l', '5l']
+
+
+def product_names(count: int, rng: random.Random):
+    """Yield count distinct synthetic normalized product names."""
+    for index in range(count):
+        parts = [rng.choice(BRANDS), rng.choice(VARIANTS), rng.choice(ITEMS), rng.choice(SIZES)]
+        # The index keeps names distinct at 1M rows, like real SKUs with pack codes
+        yield ' '.join(part for part in parts if part) + f' {index:x}'
+
+
+def query_mix(count: int, rng: random.Random):
+    """Search texts: roughly half match some product, half match none."""
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.2:
+            queries.append(rng.choice(ITEMS))
+        elif kind < 0.5:
+            queries.append(f'{rng.choice(BRANDS)} {rng.choice(ITEMS)}')
+        else:
+            queries.append(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9))))
+    return queries
+
+
+def fill(engine, size: int, rng: random.Random, batch: int = 20000):
+    """Create the products table and insert size synthetic products."""
+    Product.metadata.drop_all(engine, tables=[Product.__table__, Category.__table__])
+    Product.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    with engine.connect() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS products_fts'))
+        now = datetime.utcnow()
+        rows = []
+        for name in product_names(size, rng):
+            rows.append({'name': name, 'normalized_name': name, 'created_at': now, 'updated_at': now})
+            if len(rows) == batch:
+                conn.execute(Product.__table__.insert(), rows)
+                rows = []
+        if rows:
+            conn.execute(Product.__table__.insert(), rows)
+        conn.commit()
+
+
+def measure(engine, queries, resolve):
+    """Return (mean ms, p95 ms, queries with a match) for one resolution function."""
+    timings, hits = [], 0
+    with engine.connect() as conn:
+        for query in queries:
+            start = time.perf_counter()
+            ids = resolve(conn, query)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += bool(ids)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.95) - 1], hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark product-name resolution with and without the index.')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated catalog sizes')
+    parser.add_argument('--queries', type=int, default=200, help='Searches per measurement')
+    parser.add_argument('--database-url', help='Database to fill (default: a temporary SQLite file); '
+                                               'its products table is dropped and recreated')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'backend':>8} {'index s':>8} {'LIKE ms':>8} {'LIKE p95':>9} "
+          f"{'index ms':>9} {'idx p95':>8} {'speedup':>8} {'hits':>9}")
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        rng = random.Random(args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            fill(engine, size, rng)
+
+            start = time.perf_counter()
+            backend = ensure_product_index(engine)
+            index_seconds = time.perf_counter() - start
+
+            queries = query_mix(args.queries, rng)
+            like_ms, like_p95, like_hits = measure(engine, queries, match_product_ids_like)
+            index_ms, index_p95, index_hits = measure(
+                engine, queries, lambda conn, query: match_product_ids(conn, query, backend=backend))
+            engine.dispose()
+
+        print(f"{size:>9} {backend or 'none':>8} {index_seconds:>8.1f} {like_ms:>8.2f} {like_p95:>9.2f} "
+              f"{index_ms:>9.2f} {index_p95:>8.2f} {like_ms / index_ms:>7.1f}x {index_hits:>4}/{like_hits:<4}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark the thread-pool and asyncio scraper engines against local mock stores.
+Every store scraper is pointed at the local mock store server, so no real store is hit.
+
+Usage:
+    python scripts/benchmark_scraper_engines.py
+    python scripts/benchmark_scraper_engines.py --levels 10,100,1000 --latency-ms 150
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers.price_scraper import fetch_prices_async
+from scrapers.registry import get_enabled_adapters
+from scrapers.executor import ScraperExecutor
+from scrapers.cache import get_scraper_cache
+from scrapers import async_engine
+from scrapers.rate_limit import HostRateLimiter, set_rate_limiter
+from scripts.mock_store_server import MockStoreConfig, start_mock_server, mock_base_urls
+
+def start_mock_stores(latency_ms: float, jitter_ms: float):
+    """Start the mock store server with small synthetic pages; returns {store: base_url}."""
+    config = MockStoreConfig(latency='normal', latency_ms=latency_ms, jitter_ms=jitter_ms, cards=1)
+    # Every mock store shares one host; measure the engines, not the store rate limit
+    set_rate_limiter(HostRateLimiter(rate=0))
+    return mock_base_urls(start_mock_server(config))
+
+
+class ThreadSampler:
+    """Samples the live thread count while a benchmark runs."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_threads(concurrency: int, thread_workers: int):
+    """Fire `concurrency` searches at once through the thread-pool engine."""
+    adapters = get_enabled_adapters()
+    executor = ScraperExecutor(max_workers=thread_workers, queue_depth=concurrency * len(adapters),
+                               store_concurrency=concurrency)
+    scrapers = [(adapter.name, adapter.fetch_prices) for adapter in adapters]
+    latencies, found = [], []
+
+    def one_search(i):
+        start = time.perf_counter()
+        results = executor.run_stores(scrapers, f'milk {i}')
+        latencies.append(time.perf_counter() - start)
+        found.append(sum(1 for r in results.values() if r))
+
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as callers:
+            list(callers.map(one_search, range(concurrency)))
+        wall = time.perf_counter() - start
+
+    executor.shutdown(wait=True)
+    return wall, latencies, found, sampler.peak
+
+
+def run_asyncio(concurrency: int):
+    """Fire `concurrency` searches at once through fetch_prices_async."""
+    latencies, found = [], []
+
+    async def one_search(i):
+        start = time.perf_counter()
+        results = await fetch_prices_async(f'milk {i}')
+        latencies.append(time.perf_counter() - start)
+        found.append(len(results))
+
+    async def all_searches():
+        await asyncio.gather(*(one_search(i) for i in range(concurrency)))
+
+    # Measure the engine, not the scraper cache or coalescing
+    get_scraper_cache().invalidate()
+
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        async_engine.run_coroutine(all_searches())
+        wall = time.perf_counter() - start
+
+    return wall, latencies, found, sampler.peak
+
+
+def report(engine, concurrency, wall, latencies, found, peak_threads):
+    stores = len(get_enabled_adapters())
+    complete = sum(1 for f in found if f == stores)
+    print(
+        f"{engine:<8} {concurrency:>6} {wall:>8.2f}s {concurrency / wall:>9.1f} "
+        f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+        f"{percentile(latencies, 99) * 1000:>8.0f} {peak_threads:>8} {complete:>6}/{concurrency}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark thread vs asyncio scraper engines.')
+    parser.add_argument('--levels', default='10,100,1000', help='Comma-separated concurrent query counts')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Mean mock store latency')
+    parser.add_argument('--jitter-ms', type=float, default=25, help='Mock store latency std deviation')
+    parser.add_argument('--thread-workers', type=int, default=64, help='Scraper threads for the thread engine')
+    args = parser.parse_args()
+
+    if not async_engine.is_available():
+        print('aiohttp is not installed; the asyncio engine cannot be benchmarked.')
+        return
+
+    base_urls = start_mock_stores(args.latency_ms, args.jitter_ms)
+    for adapter in get_enabled_adapters():
+        adapter.base_url = base_urls[adapter.name]
+
+    print(f"Mock stores: {len(base_urls)}, latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms")
+    print(f"{'engine':<8} {'conc':>6} {'wall':>9} {'queries/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'threads':>8} {'complete':>13}")
+
+    for level in [int(x) for x in args.levels.split(',') if x.strip()]:
+        report('threads', level, *run_threads(level, args.thread_workers))
+        report('asyncio', level, *run_asyncio(level))
+
+
+if __name__ == '__main__':
+    main()
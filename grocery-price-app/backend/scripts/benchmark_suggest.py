@@ -0,0 +1,142 @@
+"""
+Benchmark the in-memory autocomplete index: build time, memory footprint and
+query latency of prefix and fuzzy (typo-tolerant) suggestions.
+
+Names are synthetic grocery products (brand, variant, item, flavour, size)
+with a few thousand distinct words. Fuzzy queries are words of real names
+with one or two random typos, cut off the way a user types them.
+
+Usage:
+    python scripts/benchmark_suggest.py
+    python scripts/benchmark_suggest.py --sizes 10000,100000 --queries 5000 --max-edits 1
+"""
+import sys
+import os
+import gc
+import time
+import random
+import string
+import argparse
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from suggest_index import SuggestIndex, SUGGEST_FUZZY_BUDGET_MS
+
+BRANDS = ['amul', 'tata', 'aashirvaad', 'fortune', 'britannia', 'nestle', 'mother dairy', 'haldiram',
+          'mtr', 'everest', 'patanjali', 'dabur', 'parle', 'kelloggs', 'saffola', 'india gate']
+ITEMS = ['milk', 'butter', 'paneer', 'curd', 'ghee', 'atta', 'basmati rice', 'toor dal', 'moong dal',
+         'sugar', 'salt', 'sunflower oil', 'mustard oil', 'tea', 'coffee', 'biscuits', 'bread', 'cornflakes',
+         'honey', 'turmeric powder', 'chilli powder', 'garam masala', 'poha', 'besan', 'namkeen', 'cheese',
+         'tomato', 'tomato ketchup', 'onion', 'potato', 'banana', 'mango pickle', 'noodles', 'pasta']
+VARIANTS = ['', 'organic', 'premium', 'classic', 'gold', 'lite', 'fresh', 'toned', 'whole wheat', 'family pack']
+SIZES = ['100g', '200g', '250g', '500g', '1kg', '2kg', '5kg', '500ml', '1l', '5l']
+
+
+def flavours(count: int, rng: random.Random):
+    """Made-up pronounceable words standing in for flavours, sub-brands and pack names."""
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice('bcdfghjklmnprstv') + rng.choice('aeiou') for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def product_names(count: int, rng: random.Random):
+    """count distinct synthetic normalized product names."""
+    words = flavours(max(100, count // 20), rng)
+    names = set()
+    while len(names) < count:
+        parts = [rng.choice(BRANDS), rng.choice(VARIANTS), rng.choice(ITEMS), rng.choice(words), rng.choice(SIZES)]
+        names.add(' '.join(part for part in parts if part))
+    return sorted(names)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    """word with one random insertion, deletion, substitution or transposition after its first two characters."""
+    if len(word) < 4:
+        return word
+    i = rng.randint(2, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    if kind == 2:
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def queries(names, count: int, rng: random.Random):
+    """(prefix queries, fuzzy queries) taken from random names."""
+    prefixes, fuzzy = [], []
+    for name in rng.sample(names, count):
+        prefixes.append(name[:rng.randint(1, len(name))])
+        words = name.split()[:rng.randint(1, 3)]
+        words = [typo(word, rng) if rng.random() < 0.5 else word for word in words]
+        last = words[-1]
+        words[-1] = last[:rng.randint(min(len(last), 4), len(last))]
+        fuzzy.append(' '.join(words))
+    return prefixes, fuzzy
+
+
+def build(names, max_edits: int) -> SuggestIndex:
+    index = SuggestIndex(max_edits=max_edits)
+    index.build([(product_id, name, name) for product_id, name in enumerate(names)])
+    return index
+
+
+def measure(queries, lookup):
+    """Return (p50 ms, p99 ms, max ms, queries with a suggestion) for one lookup function."""
+    timings, hits = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        hits += bool(lookup(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1], timings[-1], hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prefix and fuzzy suggestions from the in-memory index.')
+    parser.add_argument('--sizes', default='10000,100000', help='Comma-separated catalog sizes')
+    parser.add_argument('--queries', type=int, default=2000, help='Queries per measurement')
+    parser.add_argument('--max-edits', type=int, default=2, help='SUGGEST_FUZZY_MAX_EDITS for the index')
+    parser.add_argument('--budget-ms', type=float, default=SUGGEST_FUZZY_BUDGET_MS,
+                        help='SUGGEST_FUZZY_BUDGET_MS for fuzzy lookups')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'names':>7} {'words':>6} {'deletes':>8} {'build s':>8} {'MB':>6} "
+          f"{'prefix p50':>10} {'p99':>6} {'fuzzy p50':>10} {'p99':>6} {'max':>6} {'fuzzy hits':>11}")
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        rng = random.Random(args.seed)
+        names = product_names(size, rng)
+
+        gc.collect()
+        start = time.perf_counter()
+        index = build(names, args.max_edits)
+        build_seconds = time.perf_counter() - start
+        stats = index.stats()
+        del index
+
+        # Traced separately: tracemalloc slows the build down several times
+        gc.collect()
+        tracemalloc.start()
+        index = build(names, args.max_edits)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+
+        prefixes, fuzzy = queries(names, min(args.queries, size), rng)
+        prefix_p50, prefix_p99, _, _ = measure(prefixes, lambda query: index.suggest(query, 10))
+        fuzzy_p50, fuzzy_p99, fuzzy_max, hits = measure(
+            fuzzy, lambda query: index.fuzzy(query, 10, budget_ms=args.budget_ms))
+
+        print(f"{size:>7} {stats['words']:>6} {stats['deletes']:>8} {build_seconds:>8.2f} {memory_mb:>6.1f} "
+              f"{prefix_p50:>10.3f} {prefix_p99:>6.3f} {fuzzy_p50:>10.3f} {fuzzy_p99:>6.2f} {fuzzy_max:>6.2f} "
+              f"{hits:>5}/{len(fuzzy):<5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Bulk catalog scrape: fetch prices for a list of products and store them.
+
+Reads one product name per line (blank lines and #comments are skipped) from a
+file or stdin. Stores are scraped with a global product concurrency limit and a
+per-store request rate; prices are saved in batched transactions. Every
+committed product that at least one store answered is appended to a
+checkpoint file, so a killed run started again with the same checkpoint
+continues where it stopped, and products every store failed on are retried.
+
+Usage:
+    python scripts/bulk_scrape.py staples.txt
+    python scripts/bulk_scrape.py staples.txt --concurrency 20 --store-rate 4 --store-rates "Zepto=2"
+    cat staples.txt | python scripts/bulk_scrape.py - --checkpoint staples.done
+"""
+import sys
+import os
+import time
+import queue
+import asyncio
+import threading
+import argparse
+from typing import Dict, List, Set
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from models import db
+from price_store import get_or_create_product, save_prices
+from scrapers import async_engine
+from scrapers.registry import get_enabled_adapters
+from scrapers.price_scraper import fetch_store_prices_async
+from scrapers.rate_limit import HostRateLimiter, set_rate_limiter
+from utils import normalize_product_name
+
+# Seconds a bulk request may queue for a shared rate limit token
+BULK_RATE_LIMIT_MAX_WAIT = 60.0
+
+
+class StoreRateLimiter:
+    """Spaces requests to one store at a fixed rate (single event loop)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        at = max(now, self._next_at)
+        self._next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+def read_products(source: str, done: Set[str]) -> List[str]:
+    """Read product names, dropping duplicates and names already in the checkpoint."""
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        products, seen = [], set(done)
+        for line in stream:
+            name = line.split('#', 1)[0].strip()
+            normalized = normalize_product_name(name)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                products.append(name)
+        return products
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    """Normalized names of products already committed by earlier runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def parse_store_rates(value: str) -> Dict[str, float]:
+    """Parse "Store=rate,Store=rate" overrides."""
+    rates = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            store, rate = item.split('=', 1)
+            rates[store.strip()] = float(rate)
+    return rates
+
+
+async def scrape_all(products: List[str], concurrency: int, limiters: Dict[str, StoreRateLimiter],
+                     results: queue.Queue, stop: threading.Event):
+    """
+    Scrape every product on the async engine and put
+    (product, prices, store fetches, store errors) on the results queue.
+    """
+    adapters = get_enabled_adapters()
+    pending = iter(products)
+
+    async def fetch_store(adapter, product_name):
+        await limiters[adapter.name].wait()
+        # Prices are saved as scraped now, so never take them from the scraper cache
+        return await fetch_store_prices_async(adapter, product_name, use_cache=False)
+
+    async def worker():
+        for product_name in pending:
+            if stop.is_set():
+                return
+            outcomes = await asyncio.gather(*(fetch_store(adapter, product_name) for adapter in adapters),
+                                            return_exceptions=True)
+            prices, errors = [], 0
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    errors += 1
+                elif outcome:
+                    prices.extend(outcome)
+            results.put((product_name, prices, len(adapters), errors))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+
+class Progress:
+    """Running totals and throughput for the report line."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.products = 0
+        self.found = 0
+        self.prices = 0
+        self.store_fetches = 0
+        self.store_errors = 0
+        # Products no store answered (not checkpointed, retried by the next run)
+        self.unanswered = 0
+        self.start = time.monotonic()
+
+    def add(self, prices: List[Dict], store_fetches: int, store_errors: int):
+        self.products += 1
+        self.found += 1 if prices else 0
+        self.unanswered += 1 if store_errors >= store_fetches else 0
+        self.prices += len(prices)
+        self.store_fetches += store_fetches
+        self.store_errors += store_errors
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        rate = self.products / elapsed
+        eta = (self.total - self.products) / rate if rate else 0
+        return (f"{self.products}/{self.total} products ({self.found} with prices, {self.prices} prices) | "
+                f"{rate:.1f} products/s, {self.store_fetches / elapsed:.1f} store requests/s, "
+                f"{self.store_errors} store errors, {self.unanswered} products to retry | ETA {eta:.0f}s")
+
+
+def commit_batch(batch: List, checkpoint) -> int:
+    """
+    Save one batch of (product, prices, answered) in a single transaction, then
+    checkpoint the products at least one store answered (with or without a price).
+    Products every store failed on, e.g. during an outage, are left for the next run.
+    """
+    saved = 0
+    for product_name, prices, _ in batch:
+        if prices:
+            product = get_or_create_product(product_name)
+            saved += save_prices(product.id, prices)
+    db.session.commit()
+
+    checkpoint.write(''.join(f"{normalize_product_name(name)}\n" for name, _, answered in batch if answered))
+    checkpoint.flush()
+    os.fsync(checkpoint.fileno())
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape and store prices for a list of products.')
+    parser.add_argument('input', help="Product list file, or '-' for stdin")
+    parser.add_argument('--checkpoint', help='Progress file (default: <input>.checkpoint)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Products scraped at once')
+    parser.add_argument('--store-rate', type=float, default=5.0,
+                        help='Requests per second per store (0 = unlimited)')
+    parser.add_argument('--store-rates', default='', help='Per-store overrides, e.g. "Zepto=2,JioMart=1"')
+    parser.add_argument('--batch-size', type=int, default=50, help='Products per database transaction')
+    parser.add_argument('--report-every', type=float, default=10.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or (
+        'bulk_scrape.checkpoint' if args.input == '-' else f'{args.input}.checkpoint')
+    done = read_checkpoint(checkpoint_path)
+    products = read_products(args.input, done)
+    print(f"{len(products)} products to scrape ({len(done)} already done per {checkpoint_path})")
+    if not products:
+        return
+
+    overrides = parse_store_rates(args.store_rates)
+    limiters = {adapter.name: StoreRateLimiter(overrides.get(adapter.name, args.store_rate))
+                for adapter in get_enabled_adapters()}
+    # Stay under the shared per-host limit too, but queue for it instead of giving up
+    set_rate_limiter(HostRateLimiter(max_wait=BULK_RATE_LIMIT_MAX_WAIT))
+
+    app = create_app()
+    results = queue.Queue()
+    progress = Progress(len(products))
+    stop = threading.Event()
+
+    future = async_engine.submit_coroutine(scrape_all(products, args.concurrency, limiters, results, stop))
+    batch = []
+    last_report = time.monotonic()
+
+    with app.app_context(), open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+        try:
+            while progress.products < progress.total:
+                try:
+                    product_name, prices, store_fetches, store_errors = results.get(timeout=1)
+                except queue.Empty:
+                    if future.done():
+                        future.result()  # Surface a crashed run
+                        break
+                    continue
+
+                progress.add(prices, store_fetches, store_errors)
+                batch.append((product_name, prices, store_errors < store_fetches))
+                if len(batch) >= args.batch_size:
+                    commit_batch(batch, checkpoint)
+                    batch = []
+
+                if time.monotonic() - last_report >= args.report_every:
+                    print(progress.report())
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            print("Interrupted; saving finished products. Run again to resume.")
+            stop.set()
+        finally:
+            # Anything scraped but not committed is simply redone on the next run
+            if batch:
+                try:
+                    commit_batch(batch, checkpoint)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error saving last batch: {str(e)}")
+
+    print(progress.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Local mock store server for offline scraper benchmarks and regression runs.
+
+Serves every configured store under /<store_slug>/ on one port. Search pages are
+replayed from recorded fixtures (SCRAPER_RECORD_DIR layout) when available,
+otherwise synthesized. Latency distribution, error rate and slow-drip bodies
+are configurable.
+
+Point the scrapers at it with SCRAPER_MOCK_URL=http://127.0.0.1:8099, or
+per store with SCRAPER_BASE_URL_<STORE_SLUG>.
+
+Usage:
+    python scripts/mock_store_server.py --port 8099 --fixtures-dir fixtures/pages
+    python scripts/mock_store_server.py --latency lognormal --latency-ms 200 --jitter-ms 150 \\
+        --error-rate 0.05 --drip-rate 0.1
+"""
+import sys
+import os
+import re
+import hashlib
+import math
+import random
+import asyncio
+import argparse
+import threading
+from typing import Dict, Optional
+from urllib.parse import unquote
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiohttp import web
+from scrapers.registry import get_enabled_adapters, store_slug
+from scrapers.fixtures import load_fixtures, read_fixture
+
+# Markup for one result card per store, keyed by store slug
+CARD_MARKUP = {
+    'bigbasket': '<div class="product-item" data-product-id="{i}"><a href="/pd/{i}/">{name} {i}</a>'
+                 '<span class="discnt-price">&#8377;{price}</span></div>',
+    'zepto': '<div class="product-card" data-product-id="{i}"><a href="/pn/{i}">{name} {i}</a>'
+             '<span class="price">&#8377;{price}</span></div>',
+    'swiggy_instamart': '<div class="ProductCard" data-testid="product-card"><a href="/item/{i}">{name} {i}</a>'
+                 '<div class="ProductCard__price">&#8377;{price}</div></div>',
+    'jiomart': '<div class="product-item" data-product-id="{i}"><a href="/p/{i}">{name} {i}</a>'
+               '<span class="price">&#8377;{price}</span></div>',
+    'amazon_fresh': '<div data-component-type="s-search-result"><a class="a-link-normal" href="/dp/{i}">{name} {i}</a>'
+                   '<span class="a-price-whole">{price}</span></div>',
+}
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'normal', 'lognormal', 'exponential')
+
+
+def synthesize_page(key: str, cards: int, name: str = 'Fresh Milk', padded: bool = True) -> bytes:
+    """
+    Build a search page for a store.
+    Padded pages have the weight of a real one: big head, nav, result grid, footer.
+    """
+    grid = ''.join(CARD_MARKUP[key].format(i=i, price=40 + i, name=name) for i in range(cards))
+    if not padded:
+        return f'<html><body><div class="grid">{grid}</div></body></html>'.encode('utf-8')
+    head = '<script>' + ('var config = {"k": "v"};' * 4000) + '</script>'
+    style = '<style>' + ('.c{margin:0;padding:0}' * 2000) + '</style>'
+    nav = '<nav>' + ''.join(f'<a href="/c/{i}">Category {i}</a>' for i in range(300)) + '</nav>'
+    footer = '<footer>' + ''.join(f'<p>Footer link {i}</p>' for i in range(500)) + '</footer>'
+    html = (f'<!DOCTYPE html><html><head><meta charset="utf-8">{head}{style}</head>'
+            f'<body>{nav}<main><div class="grid">{grid}</div></main>{footer}</body></html>')
+    return html.encode('utf-8')
+
+
+class MockStoreConfig:
+    """Behaviour of the mock stores (latency in milliseconds)."""
+
+    def __init__(self, latency: str = 'normal', latency_ms: float = 100, jitter_ms: float = 25,
+                 error_rate: float = 0.0, error_statuses=(500, 503, 429),
+                 drip_rate: float = 0.0, drip_chunk: int = 1024, drip_delay_ms: float = 50,
+                 fixtures_dir: Optional[str] = None, miss: str = 'synthetic',
+                 cards: int = 20, padded: bool = False, etags: bool = True, compress: bool = False):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.drip_rate = drip_rate
+        self.drip_chunk = drip_chunk
+        self.drip_delay_ms = drip_delay_ms
+        self.fixtures_dir = fixtures_dir
+        # What to serve for a query without a fixture: 'synthetic' page or '404'
+        self.miss = miss
+        self.cards = cards
+        self.padded = padded
+        # Send ETags and answer If-None-Match with 304, like a CDN-fronted store
+        self.etags = etags
+        # gzip/deflate bodies for clients that accept it
+        self.compress = compress
+
+    def sample_latency_ms(self) -> float:
+        """Draw one response delay from the configured distribution."""
+        if self.latency == 'fixed':
+            return self.latency_ms
+        if self.latency == 'normal':
+            return max(0.0, random.gauss(self.latency_ms, self.jitter_ms))
+        if self.latency == 'exponential':
+            return random.expovariate(1.0 / self.latency_ms) if self.latency_ms > 0 else 0.0
+        # lognormal: latency_ms is the median, jitter_ms shapes the tail
+        if self.latency_ms <= 0:
+            return 0.0
+        sigma = math.log1p(self.jitter_ms / self.latency_ms)
+        return random.lognormvariate(math.log(self.latency_ms), sigma)
+
+
+def _query_pattern(adapter) -> re.Pattern:
+    """Regex that pulls the query back out of a store's (URL-decoded) search path."""
+    before, _, after = adapter.search_path.partition('{query}')
+    return re.compile(re.escape(unquote(before)) + r'(?P<query>[^&#]*?)' + re.escape(unquote(after)) + '$')
+
+
+class MockStoreServer:
+    """aiohttp app serving all stores under /<store_slug>/."""
+
+    def __init__(self, config: MockStoreConfig):
+        self.config = config
+        self.stores = {}
+        for adapter in get_enabled_adapters():
+            self.stores[store_slug(adapter.name)] = (adapter, _query_pattern(adapter))
+        self.fixtures = load_fixtures(config.fixtures_dir)
+        self.stats = {'requests': 0, 'fixture_hits': 0, 'synthetic': 0, 'errors': 0, 'dripped': 0,
+                      'not_found': 0, 'not_modified': 0}
+
+    def _page(self, slug: str, path_qs: str) -> Optional[bytes]:
+        adapter, pattern = self.stores[slug]
+        # Clients may re-encode the URL (e.g. %3A -> :), so match on the decoded form
+        match = pattern.match(unquote(path_qs))
+        query = match.group('query').replace(unquote(adapter.query_space), ' ') if match else ''
+
+        content = read_fixture(self.fixtures, adapter.name, query) if query else None
+        if content is not None:
+            self.stats['fixture_hits'] += 1
+            return content
+        if self.config.miss == '404' or slug not in CARD_MARKUP:
+            return None
+        self.stats['synthetic'] += 1
+        return synthesize_page(slug, self.config.cards, name=query.title() or 'Fresh Milk',
+                               padded=self.config.padded)
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        config = self.config
+        self.stats['requests'] += 1
+        await asyncio.sleep(config.sample_latency_ms() / 1000)
+
+        slug = request.match_info['store']
+        if slug not in self.stores:
+            self.stats['not_found'] += 1
+            raise web.HTTPNotFound()
+
+        if config.error_rate and random.random() < config.error_rate:
+            self.stats['errors'] += 1
+            return web.Response(status=random.choice(config.error_statuses), text='mock store error')
+
+        # Path and query after the /<store_slug> prefix, still URL-encoded
+        path_qs = request.raw_path[len(slug) + 1:]
+        content = self._page(slug, path_qs)
+        if content is None:
+            self.stats['not_found'] += 1
+            raise web.HTTPNotFound()
+
+        headers = {}
+        if config.etags:
+            etag = '"' + hashlib.blake2b(content, digest_size=8).hexdigest() + '"'
+            if request.headers.get('If-None-Match') == etag:
+                self.stats['not_modified'] += 1
+                return web.Response(status=304, headers={'ETag': etag})
+            headers['ETag'] = etag
+
+        if config.drip_rate and random.random() < config.drip_rate:
+            # Slow-drip body: headers arrive quickly, the page trickles in
+            self.stats['dripped'] += 1
+            response = web.StreamResponse(headers=dict(headers, **{'Content-Type': 'text/html; charset=utf-8'}))
+            response.content_length = len(content)
+            await response.prepare(request)
+            for offset in range(0, len(content), config.drip_chunk):
+                await response.write(content[offset:offset + config.drip_chunk])
+                await asyncio.sleep(config.drip_delay_ms / 1000)
+            await response.write_eof()
+            return response
+
+        response = web.Response(body=content, content_type='text/html', charset='utf-8', headers=headers)
+        if config.compress:
+            response.enable_compression()
+        return response
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('GET', '/{store}/{tail:.*}', self.handle)
+        app.router.add_route('GET', '/{store}', self.handle)
+        return app
+
+
+def start_mock_server(config: MockStoreConfig, host: str = '127.0.0.1', port: int = 0) -> str:
+    """Start the mock server on a background thread; returns its base URL."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name='mock-stores', daemon=True).start()
+    server = MockStoreServer(config)
+
+    async def start():
+        runner = web.AppRunner(server.make_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port, backlog=4096)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    bound_port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    return f'http://{host}:{bound_port}'
+
+
+def mock_base_urls(server_url: str) -> Dict[str, str]:
+    """Base URL of every enabled store on a mock server, {store: url}."""
+    return {adapter.name: f'{server_url}/{store_slug(adapter.name)}' for adapter in get_enabled_adapters()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve mock store search pages for offline scraper runs.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fixtures-dir', help='Recorded pages (<store_slug>/<query_slug>.html)')
+    parser.add_argument('--miss', choices=('synthetic', '404'), default='synthetic',
+                        help='Response for queries without a fixture')
+    parser.add_argument('--cards', type=int, default=20, help='Cards per synthesized page')
+    parser.add_argument('--padded', action='store_true', help='Synthesize real-size pages (head, nav, footer)')
+    parser.add_argument('--no-etags', action='store_true', help='Do not send ETags or answer 304')
+    parser.add_argument('--compress', action='store_true', help='Compress bodies when the client accepts it')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='normal')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Mean (median for lognormal) latency')
+    parser.add_argument('--jitter-ms', type=float, default=25, help='Latency spread')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with an error')
+    parser.add_argument('--error-statuses', default='500,503,429', help='Statuses used for injected errors')
+    parser.add_argument('--drip-rate', type=float, default=0.0, help='Fraction of responses sent as a slow drip')
+    parser.add_argument('--drip-chunk', type=int, default=1024, help='Bytes per slow-drip chunk')
+    parser.add_argument('--drip-delay-ms', type=float, default=50, help='Delay between slow-drip chunks')
+    args = parser.parse_args()
+
+    config = MockStoreConfig(
+        latency=args.latency, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_statuses.split(',') if status.strip()],
+        drip_rate=args.drip_rate, drip_chunk=args.drip_chunk, drip_delay_ms=args.drip_delay_ms,
+        fixtures_dir=args.fixtures_dir, miss=args.miss, cards=args.cards, padded=args.padded,
+        etags=not args.no_etags, compress=args.compress,
+    )
+    server = MockStoreServer(config)
+    print(f"Mock stores on http://{args.host}:{args.port} ({len(server.fixtures)} fixtures); "
+          f"set SCRAPER_MOCK_URL=http://{args.host}:{args.port}")
+    for name, url in mock_base_urls(f'http://{args.host}:{args.port}').items():
+        print(f"  {name}: {url}")
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Regenerate the current_prices table (newest price per product and store)
+from the full price history, e.g. after editing prices by hand.
+
+Usage:
+    python scripts/rebuild_current_prices.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from models import db
+from price_store import rebuild_current_prices
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        try:
+            count = rebuild_current_prices()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        print(f"Rebuilt current_prices: {count} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Refresh prices for the most searched products (see refresh_worker.py).
+Runs one cycle and exits, or keeps running on the refresh interval with --loop.
+
+Usage:
+    python scripts/refresh_prices.py
+    python scripts/refresh_prices.py --top 100 --budget 500 --loop
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+import refresh_worker
+from refresh_worker import run_refresh_cycle, popular_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-scrape prices for the most searched products.')
+    parser.add_argument('--top', type=int, default=refresh_worker.REFRESH_TOP_N,
+                        help='Products considered per cycle')
+    parser.add_argument('--budget', type=int, default=refresh_worker.REFRESH_REQUEST_BUDGET,
+                        help='Store requests allowed per cycle')
+    parser.add_argument('--store-interval', type=float, default=refresh_worker.REFRESH_STORE_INTERVAL,
+                        help='Minimum seconds between requests to one store')
+    parser.add_argument('--loop', action='store_true', help='Keep running every --interval seconds')
+    parser.add_argument('--interval', type=float, default=refresh_worker.REFRESH_INTERVAL,
+                        help='Seconds between cycles with --loop')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the ranked products')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.dry_run:
+            for entry in popular_products(limit=args.top):
+                print(f"{entry['searches']:>6}  {entry['product'].name}")
+            return
+
+        while True:
+            summary = run_refresh_cycle(top_n=args.top, request_budget=args.budget,
+                                        store_interval=args.store_interval)
+            print(f"Refreshed {summary['refreshed']} products ({summary['prices_saved']} prices, "
+                  f"{summary['store_requests']} store requests, {summary['skipped_fresh']} already fresh, "
+                  f"{summary['errors']} errors) in {summary['seconds']}s")
+            if not args.loop:
+                break
+            time.sleep(args.interval * (1 + random.uniform(0, refresh_worker.REFRESH_JITTER)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Write-behind logging of user searches.
+/search queues its SearchHistory record here instead of inserting it in the
+price transaction; a background writer bulk-inserts queued records on a size
+or time threshold, and once more on shutdown.
+"""
+import os
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models import db, SearchHistory
+
+
+SEARCH_HISTORY_WRITE_BEHIND = os.getenv('SEARCH_HISTORY_WRITE_BEHIND', 'True').lower() == 'true'
+# Records per bulk insert; a full batch is written right away
+SEARCH_HISTORY_BATCH_SIZE = int(os.getenv('SEARCH_HISTORY_BATCH_SIZE', 200))
+# Max seconds a record waits before it is written
+SEARCH_HISTORY_FLUSH_SECONDS = float(os.getenv('SEARCH_HISTORY_FLUSH_SECONDS', 2.0))
+# Records held in memory; new searches are dropped (and counted) when full
+SEARCH_HISTORY_MAX_PENDING = int(os.getenv('SEARCH_HISTORY_MAX_PENDING', 10000))
+
+
+def _record(user_id: int, query: str, results_count: int) -> Dict:
+    return {
+        'user_id': user_id,
+        'query': query[:200],
+        'results_count': results_count,
+        'searched_at': datetime.utcnow()
+    }
+
+
+class SearchHistoryWriter:
+    """Buffers SearchHistory records in memory and writes them in batches."""
+
+    def __init__(self, app, batch_size: int = SEARCH_HISTORY_BATCH_SIZE,
+                 flush_seconds: float = SEARCH_HISTORY_FLUSH_SECONDS,
+                 max_pending: int = SEARCH_HISTORY_MAX_PENDING):
+        self.app = app
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending = deque()
+        # Batch being written; still visible to pending() until committed
+        self._writing: List[Dict] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'queued': 0, 'dropped': 0, 'batches': 0, 'written': 0, 'errors': 0}
+
+    def add(self, user_id: int, query: str, results_count: int) -> bool:
+        """Queue one search without touching the database. Returns False if the buffer is full."""
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._stats['dropped'] += 1
+                return False
+            self._pending.append(_record(user_id, query, results_count))
+            self._stats['queued'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+            return True
+
+    def pending(self, user_id: int) -> List[Dict]:
+        """A user's searches not yet written, newest first."""
+        with self._cond:
+            records = [record for record in list(self._writing) + list(self._pending)
+                       if record['user_id'] == user_id]
+        return records[::-1]
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='search-history-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the writer after it has flushed everything queued."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _take_batch(self) -> List[Dict]:
+        with self._cond:
+            count = min(self.batch_size, len(self._pending))
+            self._writing = [self._pending.popleft() for _ in range(count)]
+            return self._writing
+
+    def flush(self):
+        """Write everything queued so far, one transaction per batch."""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            with self.app.app_context():
+                try:
+                    db.session.execute(SearchHistory.__table__.insert(), batch)
+                    db.session.commit()
+                    with self._cond:
+                        self._stats['batches'] += 1
+                        self._stats['written'] += len(batch)
+                except Exception as e:
+                    db.session.rollback()
+                    with self._cond:
+                        self._stats['errors'] += 1
+                    print(f"Error saving search history: {str(e)}")
+                finally:
+                    db.session.remove()
+                    with self._cond:
+                        self._writing = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._stop.is_set():
+                    self._cond.wait(self.flush_seconds)
+            self.flush()
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending) + len(self._writing)
+        return stats
+
+
+_writer: Optional[SearchHistoryWriter] = None
+
+
+def record_search(user_id: int, query: str, results_count: int):
+    """
+    Log a search. Queued for the background writer when it is running,
+    otherwise inserted and committed right away in its own transaction.
+    """
+    if _writer is not None:
+        _writer.add(user_id, query, results_count)
+        return
+    db.session.add(SearchHistory(**_record(user_id, query, results_count)))
+    db.session.commit()
+
+
+def pending_searches(user_id: int) -> List[Dict]:
+    """A user's searches still waiting to be written, in SearchHistory.to_dict form (id None)."""
+    if _writer is None:
+        return []
+    return [dict(record, id=None, searched_at=record['searched_at'].isoformat())
+            for record in _writer.pending(user_id)]
+
+
+def get_search_history_stats() -> Dict:
+    """Write-behind counters, or {'enabled': False} when searches are written inline."""
+    if _writer is None:
+        return {'enabled': False}
+    return dict(_writer.stats(), enabled=True)
+
+
+def init_search_history(app) -> Optional[SearchHistoryWriter]:
+    """
+    Start the write-behind search history writer if SEARCH_HISTORY_WRITE_BEHIND (default on).
+    Stored in app.extensions['search_history_writer'].
+    """
+    global _writer
+    if not SEARCH_HISTORY_WRITE_BEHIND:
+        return None
+    if _writer is None:
+        _writer = SearchHistoryWriter(app)
+        _writer.start()
+        atexit.register(_writer.stop, 5)
+    app.extensions['search_history_writer'] = _writer
+    return _writer
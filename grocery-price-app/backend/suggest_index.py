@@ -0,0 +1,420 @@
+"""
+In-process autocomplete index for /products/suggest.
+Normalized product names are kept in a sorted array. The top suggestions for
+every prefix up to SUGGEST_PREFIX_DEPTH characters are precomputed, and
+longer prefixes look up their range of the array. Suggestions are ranked by
+search popularity, then by name. The index is built from the database in
+the background at startup and kept current by committed product inserts and
+by /search, so suggestions never touch the database. Products created by
+other processes (other workers, scripts/bulk_scrape.py) are picked up by
+polling for new product ids every SUGGEST_REFRESH_SECONDS.
+
+Fuzzy mode tolerates typos ("panner" -> paneer, "tomatoe" -> tomato) with a
+SymSpell-style index: every word of every name is stored with the strings
+reachable from its first FUZZY_PREFIX_LENGTH characters by deleting up to
+SUGGEST_FUZZY_MAX_EDITS characters. A query word's own deletes then find the
+dictionary words within that edit distance without scanning the vocabulary.
+"""
+import os
+import time
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import groupby, product
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from models import db, Product, SearchHistory
+from utils import normalize_product_name
+
+
+SUGGEST_INDEX_ENABLED = os.getenv('SUGGEST_INDEX_ENABLED', 'True').lower() == 'true'
+# Prefixes up to this length have their top suggestions precomputed
+SUGGEST_PREFIX_DEPTH = int(os.getenv('SUGGEST_PREFIX_DEPTH', 3))
+# Suggestions kept per precomputed prefix (the most /products/suggest returns)
+SUGGEST_TOP_K = int(os.getenv('SUGGEST_TOP_K', 10))
+# Seconds between polls for products created by other processes (0 disables)
+SUGGEST_REFRESH_SECONDS = float(os.getenv('SUGGEST_REFRESH_SECONDS', 30))
+# Most edits (insert, delete, substitute, transpose) per word in fuzzy mode, 0 disables typo
+# tolerance. Words under 3 characters must match exactly and words under 6 get one edit.
+SUGGEST_FUZZY_MAX_EDITS = int(os.getenv('SUGGEST_FUZZY_MAX_EDITS', 2))
+# Milliseconds one fuzzy lookup may spend matching words before it answers with what it has
+SUGGEST_FUZZY_BUDGET_MS = float(os.getenv('SUGGEST_FUZZY_BUDGET_MS', 20))
+
+# Characters of a word expanded into deletes; longer words are verified in full
+FUZZY_PREFIX_LENGTH = 7
+# Query words considered in fuzzy mode
+FUZZY_MAX_WORDS = 6
+# Per-word edit combinations ranked per fuzzy lookup, fewest total edits first
+FUZZY_MAX_COMBINATIONS = 64
+
+# Product ids below the highest indexed one that are polled again, for inserts
+# that committed out of id order (concurrent transactions)
+REFRESH_OVERLAP_IDS = 1000
+
+
+def _deletes(word: str, max_edits: int) -> Set[str]:
+    """The word's first FUZZY_PREFIX_LENGTH characters and every string left by deleting up to max_edits of them."""
+    found = frontier = {word[:FUZZY_PREFIX_LENGTH]}
+    for _ in range(max_edits):
+        frontier = {part[:i] + part[i + 1:] for part in frontier for i in range(len(part))}
+        found = found | frontier
+    return found
+
+
+def _edit_distance(a: str, b: str, limit: int, prefix: bool = False) -> int:
+    """
+    Optimal string alignment distance between a and b (with prefix, between a and the
+    closest beginning of b), or limit + 1 once it is over limit.
+    """
+    if prefix:
+        b = b[:len(a) + limit]
+    elif abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(min(previous) if prefix else previous[-1], limit + 1)
+
+
+class SuggestIndex:
+    """Sorted normalized names with precomputed top-k suggestions per short prefix."""
+
+    def __init__(self, depth: int = SUGGEST_PREFIX_DEPTH, top_k: int = SUGGEST_TOP_K,
+                 max_edits: int = SUGGEST_FUZZY_MAX_EDITS):
+        self.depth = max(1, depth)
+        self.top_k = max(1, top_k)
+        self.max_edits = max(0, max_edits)
+        self.ready = False
+        # Highest product id indexed (see load_new_products)
+        self.max_product_id = 0
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        # normalized name -> [product id, display name, searches]
+        self._entries: Dict[str, List] = {}
+        # prefix -> normalized names, best first
+        self._top: Dict[str, List[str]] = {}
+        # Normalized names searched at least once, sorted (the rest rank by name alone)
+        self._searched: List[str] = []
+        # word -> normalized names containing it, sorted words, delete -> words
+        self._words: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._deletes: Dict[str, List[str]] = {}
+
+    def _rank(self, key: str):
+        return -self._entries[key][2], key
+
+    def build(self, products: List[tuple], searches: Optional[Dict[str, int]] = None):
+        """
+        Replace the index contents.
+
+        Args:
+            products: (id, display name, normalized name) rows; the first row per normalized name wins
+            searches: Search counts per normalized name
+        """
+        searches = searches or {}
+        entries = {}
+        for product_id, name, key in products:
+            if key and key not in entries:
+                entries[key] = [product_id, name, searches.get(key, 0)]
+
+        keys = sorted(entries)
+        top = {}
+        for key in sorted(keys, key=lambda key: -entries[key][2]):
+            for length in range(1, min(self.depth, len(key)) + 1):
+                best = top.setdefault(key[:length], [])
+                if len(best) < self.top_k:
+                    best.append(key)
+
+        words = {}
+        for key in keys:
+            for word in key.split():
+                words.setdefault(word, set()).add(key)
+        deletes = {}
+        if self.max_edits:
+            for word in words:
+                for delete in _deletes(word, self.max_edits):
+                    deletes.setdefault(delete, []).append(word)
+
+        with self._lock:
+            # Products added while the build was reading the database
+            late = [(key, entry) for key, entry in self._entries.items() if key not in entries]
+            self._keys, self._entries, self._top = keys, entries, top
+            self._searched = [key for key in keys if entries[key][2]]
+            self._words, self._vocabulary, self._deletes = words, sorted(words), deletes
+            self.max_product_id = max([self.max_product_id] + [row[0] for row in products])
+            for key, entry in late:
+                self._entries[key] = entry
+                insort(self._keys, key)
+                if entry[2]:
+                    insort(self._searched, key)
+                self._promote(key)
+                self._add_words(key)
+            self.ready = True
+
+    def _add_words(self, key: str):
+        """Index the words of a new normalized name for fuzzy lookups (lock held)."""
+        for word in key.split():
+            if word in self._words:
+                self._words[word].add(key)
+                continue
+            self._words[word] = {key}
+            insort(self._vocabulary, word)
+            if self.max_edits:
+                for delete in _deletes(word, self.max_edits):
+                    self._deletes.setdefault(delete, []).append(word)
+
+    def _promote(self, key: str):
+        """Re-rank key in the precomputed lists of its prefixes (lock held)."""
+        rank = self._rank(key)
+        for length in range(1, min(self.depth, len(key)) + 1):
+            best = self._top.setdefault(key[:length], [])
+            if key not in best:
+                if len(best) >= self.top_k and rank >= self._rank(best[-1]):
+                    continue
+                best.append(key)
+            best.sort(key=self._rank)
+            del best[self.top_k:]
+
+    def add(self, product_id: int, name: str, normalized_name: str) -> bool:
+        """Add a product; an existing normalized name keeps its product. Returns True if added."""
+        with self._lock:
+            self.max_product_id = max(self.max_product_id, product_id or 0)
+            if not normalized_name or normalized_name in self._entries:
+                return False
+            self._entries[normalized_name] = [product_id, name, 0]
+            insort(self._keys, normalized_name)
+            self._promote(normalized_name)
+            self._add_words(normalized_name)
+            return True
+
+    def count_search(self, normalized_name: str, count: int = 1):
+        """Record searches for a product name, moving it up its prefixes' suggestions."""
+        with self._lock:
+            entry = self._entries.get(normalized_name)
+            if entry is None:
+                return
+            if not entry[2]:
+                insort(self._searched, normalized_name)
+            entry[2] += count
+            self._promote(normalized_name)
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[Dict]:
+        """
+        Top suggestions for a normalized prefix, most searched first.
+
+        Returns:
+            [{'id', 'name'}], at most limit (capped at top_k for short prefixes)
+        """
+        if not prefix:
+            return []
+        with self._lock:
+            if len(prefix) <= self.depth:
+                keys = self._top.get(prefix, [])[:limit]
+            else:
+                # Only searched names can outrank the first names of the range
+                start = bisect_left(self._keys, prefix)
+                end = bisect_left(self._keys, prefix + '\uffff', start)
+                first = bisect_left(self._searched, prefix)
+                last = bisect_left(self._searched, prefix + '\uffff', first)
+                candidates = set(self._searched[first:last]).union(self._keys[start:min(end, start + limit)])
+                keys = heapq.nsmallest(limit, candidates, key=self._rank)
+            return [{'id': self._entries[key][0], 'name': self._entries[key][1]} for key in keys]
+
+    def _match_word(self, word: str, partial: bool, deadline: float) -> Dict[str, int]:
+        """
+        Dictionary words within the word's edit allowance (lock held).
+        A partial (last, still being typed) word also matches the beginning of longer words.
+
+        Returns:
+            {dictionary word: edits}
+        """
+        allowed = min(self.max_edits, len(word) // 3)
+        found, checked = {}, set()
+        if word in self._words:
+            found[word] = 0
+
+        if allowed:
+            for delete in _deletes(word, allowed):
+                for candidate in self._deletes.get(delete, ()):
+                    if candidate not in checked:
+                        checked.add(candidate)
+                        edits = _edit_distance(word, candidate, allowed)
+                        if edits <= allowed:
+                            found[candidate] = edits
+                if time.perf_counter() > deadline:
+                    return found
+
+        if partial:
+            # Typos are rare in the first two characters, so only words sharing them are compared
+            anchor = word[:2] if allowed else word
+            start = bisect_left(self._vocabulary, anchor)
+            end = bisect_left(self._vocabulary, anchor + '\uffff', start)
+            for candidate in self._vocabulary[start:end]:
+                if candidate in found:
+                    continue
+                if candidate.startswith(word):
+                    found[candidate] = 0
+                elif allowed:
+                    edits = _edit_distance(word, candidate, allowed, prefix=True)
+                    if edits <= allowed:
+                        found[candidate] = edits
+                if time.perf_counter() > deadline:
+                    break
+        return found
+
+    def fuzzy(self, query: str, limit: int = SUGGEST_TOP_K,
+              budget_ms: float = SUGGEST_FUZZY_BUDGET_MS) -> List[Dict]:
+        """
+        Typo-tolerant suggestions for a normalized query: prefix matches first, then names
+        with a matching word (within its edit allowance) for every query word, fewest
+        edits first, then most searched. Once budget_ms is spent, matching and ranking
+        stop and the suggestions found so far are returned.
+
+        Returns:
+            [{'id', 'name'}], at most limit
+        """
+        suggestions = self.suggest(query, limit)
+        words = query.split()[:FUZZY_MAX_WORDS]
+        if len(suggestions) >= limit or not words:
+            return suggestions
+
+        deadline = time.perf_counter() + budget_ms / 1000
+        with self._lock:
+            # Per query word: [(edits, names with a word matched at that many edits)]
+            tiers = []
+            for position, word in enumerate(words):
+                by_edits = {}
+                for candidate, edits in self._match_word(word, position == len(words) - 1, deadline).items():
+                    by_edits.setdefault(edits, []).append(self._words[candidate])
+                if not by_edits:
+                    return suggestions
+                tiers.append([(edits, set().union(*names)) for edits, names in by_edits.items()])
+
+            # Names needing the fewest edits in total first, each group ranked by popularity.
+            # The budget covers ranking too: stop at the first group past the deadline.
+            seen = {suggestion['id'] for suggestion in suggestions}
+            ranked = set()
+
+            def total_edits(combination):
+                return sum(edits for edits, _ in combination)
+
+            combinations = heapq.nsmallest(FUZZY_MAX_COMBINATIONS, product(*tiers), key=total_edits)
+            for _, group in groupby(combinations, key=total_edits):
+                names = set()
+                for combination in group:
+                    names |= set.intersection(*sorted((tier for _, tier in combination), key=len))
+                    if time.perf_counter() > deadline:
+                        break
+                names -= ranked
+                ranked |= names
+                candidates = names.intersection(self._searched)
+                candidates.update(heapq.nsmallest(limit + len(seen), names))
+                for key in heapq.nsmallest(limit + len(seen), candidates, key=self._rank):
+                    product_id, name = self._entries[key][:2]
+                    if product_id not in seen and len(suggestions) < limit:
+                        suggestions.append({'id': product_id, 'name': name})
+                if len(suggestions) >= limit or time.perf_counter() > deadline:
+                    break
+        return suggestions
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'ready': self.ready, 'names': len(self._keys), 'prefixes': len(self._top),
+                    'max_product_id': self.max_product_id,
+                    'words': len(self._words), 'deletes': len(self._deletes)}
+
+
+_index = SuggestIndex()
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Get the process-wide autocomplete index."""
+    return _index
+
+
+def load_suggest_index(index: SuggestIndex):
+    """Build the index from every product and all-time search counts. Must be called inside an app context."""
+    searches = {}
+    rows = db.session.query(SearchHistory.query, func.count(SearchHistory.id)).group_by(SearchHistory.query)
+    for query, count in rows:
+        normalized = normalize_product_name(query)
+        if normalized:
+            searches[normalized] = searches.get(normalized, 0) + count
+
+    products = db.session.query(Product.id, Product.name, Product.normalized_name).order_by(Product.id).all()
+    index.build(products, searches)
+
+
+def load_new_products(index: SuggestIndex) -> int:
+    """
+    Add products created since the last build or poll, including those inserted
+    by other processes. Must be called inside an app context.
+
+    Returns:
+        Number of products added
+    """
+    since = max(0, index.max_product_id - REFRESH_OVERLAP_IDS)
+    rows = db.session.query(Product.id, Product.name, Product.normalized_name).filter(
+        Product.id > since
+    ).order_by(Product.id).all()
+    return sum(index.add(*row) for row in rows)
+
+
+@event.listens_for(Product, 'after_insert')
+def _remember_new_product(mapper, connection, product):
+    session = object_session(product)
+    if session is not None:
+        session.info.setdefault('new_products', []).append(
+            (product.id, product.name, product.normalized_name))
+
+
+@event.listens_for(Session, 'after_commit')
+def _index_new_products(session):
+    for row in session.info.pop('new_products', []):
+        _index.add(*row)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_new_products(session, previous_transaction):
+    session.info.pop('new_products', None)
+
+
+def init_suggest_index(app) -> Optional[SuggestIndex]:
+    """
+    Build the autocomplete index in the background if SUGGEST_INDEX_ENABLED (default on),
+    then poll for new products every SUGGEST_REFRESH_SECONDS (a failed build is retried).
+    /products/suggest queries the database until it is ready.
+    Stored in app.extensions['suggest_index'].
+    """
+    if not SUGGEST_INDEX_ENABLED:
+        return None
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    if _index.ready:
+                        load_new_products(_index)
+                    else:
+                        load_suggest_index(_index)
+                except Exception as e:
+                    print(f"Error updating suggest index: {str(e)}")
+                finally:
+                    db.session.remove()
+            if SUGGEST_REFRESH_SECONDS <= 0:
+                return
+            time.sleep(SUGGEST_REFRESH_SECONDS)
+
+    threading.Thread(target=run, name='suggest-index-builder', daemon=True).start()
+    app.extensions['suggest_index'] = _index
+    return _index
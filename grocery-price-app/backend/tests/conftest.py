@@ -0,0 +1,42 @@
+"""
+Shared pytest setup: makes the backend modules importable from the tests and
+builds the app against a throwaway SQLite database.
+"""
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# No background writers or index builds in tests (read when the modules are imported)
+os.environ.setdefault('SCRAPER_HARVEST_ENABLED', 'False')
+os.environ.setdefault('SEARCH_HISTORY_WRITE_BEHIND', 'False')
+os.environ.setdefault('SUGGEST_INDEX_ENABLED', 'False')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The Flask app with a fresh SQLite database, inside an app context."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization header for a new user."""
+    from models import db, User
+    from utils import generate_token
+
+    user = User(username='tester', email='tester@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f'Bearer {generate_token(user.id)}'}
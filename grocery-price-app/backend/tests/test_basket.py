@@ -0,0 +1,36 @@
+"""
+Tests for POST /search/basket with partly fresh stored prices.
+"""
+from models import db, Product
+from price_store import save_prices
+from scrapers.registry import enabled_store_names
+from routes import product_routes
+
+
+def test_basket_scrapes_missing_stores_and_merges_fresh_prices(app, auth_headers, monkeypatch):
+    stores = enabled_store_names()
+    milk = Product(name='Milk', normalized_name='milk')
+    db.session.add(milk)
+    db.session.flush()
+    # Only the first store has a fresh milk price (e.g. harvested by another search)
+    save_prices(milk.id, [{'store': stores[0], 'price': 30, 'link': 'https://example.com'}])
+    db.session.commit()
+    calls = []
+
+    def fetch_basket_prices(product_names, stores=None):
+        calls.append((product_names, stores))
+        return {name: [{'store': store, 'price': 50, 'link': 'https://example.com'} for store in stores[name]]
+                for name in product_names}
+
+    monkeypatch.setattr(product_routes, 'fetch_basket_prices', fetch_basket_prices)
+
+    response = app.test_client().post('/search/basket', headers=auth_headers, json={
+        'items': [{'product_name': 'Milk'}, {'product_name': 'Bread'}]
+    })
+
+    assert response.status_code == 200
+    assert calls == [(['Milk', 'Bread'], {'Milk': stores[1:], 'Bread': stores})]
+    body = response.get_json()
+    assert [price['store'] for price in body['items'][0]['prices']] == stores
+    assert all(store['complete'] for store in body['stores'])
+    assert body['cheapest_store'] == stores[0]
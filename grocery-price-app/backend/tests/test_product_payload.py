@@ -0,0 +1,82 @@
+"""
+Tests for bounded product payloads and GET /product/<id> parameters.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Product
+from price_store import save_prices
+from product_payload import product_payloads
+
+STORES = ['BigBasket', 'Zepto', 'JioMart']
+
+
+def _add_products(count: int, days: int = 5):
+    """count products with one price per store per day for the last `days` days."""
+    products = [Product(name=f'Product {index}', normalized_name=f'product {index}') for index in range(count)]
+    db.session.add_all(products)
+    db.session.flush()
+    now = datetime.utcnow()
+    for product in products:
+        for day in range(days):
+            save_prices(product.id, [{'store': store, 'price': 10 + day, 'link': 'https://example.com'}
+                                     for store in STORES], scraped_at=now - timedelta(days=day, hours=1))
+    db.session.commit()
+    return [product.id for product in products]
+
+
+def _count_statements(func):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+@pytest.mark.parametrize('history_days', [0, 30])
+def test_payload_query_count_does_not_grow_with_products(app, history_days):
+    ids = _add_products(25)
+
+    def load(product_ids):
+        db.session.expunge_all()
+        return _count_statements(lambda: product_payloads(product_ids, history_days=history_days))
+
+    assert load(ids[:2]) == load(ids[:10]) == load(ids)
+
+
+def test_history_is_capped_per_product(app):
+    ids = _add_products(2, days=10)
+
+    payloads = product_payloads(ids, history_days=30, max_rows=4)
+
+    for product_id in ids:
+        prices = payloads[product_id]['prices']
+        assert len(prices) == 4
+        assert [price['price'] for price in prices][:3] == [10, 10, 10]
+
+
+@pytest.mark.parametrize('value', ['inf', '-inf', 'nan', '1e9', '-1', '0', 'abc'])
+def test_get_product_rejects_bad_history_days(app, auth_headers, value):
+    product_id = _add_products(1)[0]
+
+    response = app.test_client().get(f'/product/{product_id}?history_days={value}', headers=auth_headers)
+
+    assert response.status_code == 400
+    assert 'history_days' in response.get_json()['error']
+
+
+def test_get_product_accepts_history_days(app, auth_headers):
+    product_id = _add_products(1, days=3)[0]
+
+    response = app.test_client().get(f'/product/{product_id}?history_days=30', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['prices']) == 3 * len(STORES)
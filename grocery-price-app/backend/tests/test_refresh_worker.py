@@ -0,0 +1,59 @@
+"""
+Tests for the background refresh of popular products.
+"""
+from datetime import datetime, timedelta
+
+from models import db, Product, SearchHistory, User
+from price_store import save_prices
+from scrapers.registry import enabled_store_names
+import refresh_worker
+
+
+def _popular_product(name: str = 'Milk') -> Product:
+    """A product searched once in the lookback window."""
+    user = User(username='searcher', email='searcher@example.com', password_hash='x')
+    product = Product(name=name, normalized_name=name.lower())
+    db.session.add_all([user, product])
+    db.session.flush()
+    db.session.add(SearchHistory(user_id=user.id, query=name, results_count=1))
+    db.session.commit()
+    return product
+
+
+def _fake_fetch(calls):
+    def fetch_prices(product_name, unavailable=None, stores=None, use_cache=True):
+        calls.append({'stores': stores, 'use_cache': use_cache})
+        return [{'store': store, 'price': 20, 'link': 'https://example.com'} for store in stores]
+    return fetch_prices
+
+
+def test_refresh_scrapes_only_stale_stores(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(refresh_worker, 'fetch_prices', _fake_fetch(calls))
+    stores = enabled_store_names()
+    product = _popular_product()
+    # One store was just harvested, the others are old
+    save_prices(product.id, [{'store': stores[0], 'price': 10, 'link': 'https://example.com'}])
+    save_prices(product.id, [{'store': store, 'price': 10, 'link': 'https://example.com'} for store in stores[1:]],
+                scraped_at=datetime.utcnow() - timedelta(hours=1))
+    db.session.commit()
+
+    summary = refresh_worker.run_refresh_cycle(store_interval=0)
+
+    assert calls == [{'stores': stores[1:], 'use_cache': False}]
+    assert summary['refreshed'] == 1
+    assert summary['store_requests'] == len(stores) - 1
+
+
+def test_refresh_skips_products_fresh_in_every_store(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(refresh_worker, 'fetch_prices', _fake_fetch(calls))
+    product = _popular_product()
+    save_prices(product.id, [{'store': store, 'price': 10, 'link': 'https://example.com'}
+                             for store in enabled_store_names()])
+    db.session.commit()
+
+    summary = refresh_worker.run_refresh_cycle(store_interval=0)
+
+    assert calls == []
+    assert summary['skipped_fresh'] == 1
@@ -0,0 +1,60 @@
+"""
+Tests for store page parsing in the adapter registry.
+"""
+import asyncio
+
+from scrapers import price_scraper
+from scrapers.bigbasket_scraper import STORE_SPEC
+from scrapers.conditional import PageResponse
+from scrapers.registry import StoreAdapter
+
+SEARCH_URL = 'https://www.bigbasket.com/ps/?q=paneer'
+
+
+def _card(name: str, price: str) -> str:
+    return (f'<div class="product-item"><a href="/pd/{name.lower().replace(" ", "-")}/">'
+            f'<div class="prod-name">{name}</div></a><span class="discnt-price">{price}</span></div>')
+
+
+def _page(*cards: str) -> bytes:
+    return f'<html><body>{"".join(cards)}</body></html>'.encode('utf-8')
+
+
+def test_parse_skips_malformed_cards():
+    adapter = StoreAdapter(STORE_SPEC)
+    page = _page(_card('Amul Paneer', '₹90'), _card('Milky Mist Paneer', 'Out of stock'),
+                 _card('Gowardhan Paneer', ''), _card('Fresh Paneer', '₹75.50'))
+
+    cards = adapter.parse(page, SEARCH_URL, limit=40, with_names=True)
+
+    assert [card['name'] for card in cards] == ['Amul Paneer', 'Fresh Paneer']
+    assert [card['price'] for card in cards] == [90.0, 75.5]
+
+
+def test_harvested_search_uses_first_good_card(monkeypatch):
+    adapter = StoreAdapter(STORE_SPEC)
+    page = _page(_card('Milky Mist Paneer', 'Out of stock'), _card('Amul Paneer', '₹90'),
+                 _card('Fresh Paneer', '₹75.50'))
+    harvested = []
+
+    async def fetch_page(adapter, search_url, timeout, headers):
+        return PageResponse(200, page, {})
+
+    monkeypatch.setattr(price_scraper, '_fetch_page', fetch_page)
+    monkeypatch.setattr(price_scraper, '_harvest_sink', harvested.append)
+
+    results = asyncio.run(price_scraper._scrape_store_async(adapter, 'malformed card paneer'))
+
+    assert [result['price'] for result in results] == [90.0]
+    assert 'name' not in results[0]
+    assert [card['name'] for card in harvested[0]] == ['Amul Paneer', 'Fresh Paneer']
+
+
+def test_cards_named_only_by_their_link_are_not_named():
+    adapter = StoreAdapter(STORE_SPEC)
+    page = _page('<div class="product-item"><a href="/pd/1/">Add to basket</a>'
+                 '<span class="discnt-price">₹40</span></div>', _card('Amul Paneer', '₹90'))
+
+    cards = adapter.parse(page, SEARCH_URL, limit=40, with_names=True)
+
+    assert [(card['name'], card['price']) for card in cards] == [(None, 40.0), ('Amul Paneer', 90.0)]
@@ -0,0 +1,35 @@
+"""
+Tests for GET /search-history with the write-behind buffer.
+"""
+import pytest
+
+from models import User
+import search_history
+from routes import product_routes
+
+
+@pytest.mark.parametrize('flush_after_pending_read', [False, True])
+def test_history_lists_a_search_flushed_during_the_request_once(app, auth_headers, monkeypatch,
+                                                                 flush_after_pending_read):
+    writer = search_history.SearchHistoryWriter(app)
+    monkeypatch.setattr(search_history, '_writer', writer)
+    user = User.query.filter_by(username='tester').one()
+    writer.add(user.id, 'milk', 3)
+
+    # The background writer commits the buffered search while the request runs
+    def pending_searches(user_id):
+        if not flush_after_pending_read:
+            writer.flush()
+        pending = search_history.pending_searches(user_id)
+        if flush_after_pending_read:
+            writer.flush()
+        return pending
+
+    monkeypatch.setattr(product_routes, 'pending_searches', pending_searches)
+
+    response = app.test_client().get('/search-history', headers=auth_headers)
+
+    assert response.status_code == 200
+    history = response.get_json()['history']
+    assert [entry['query'] for entry in history] == ['milk']
+    assert history[0]['id'] is not None
@@ -0,0 +1,50 @@
+"""
+Tests for the in-memory autocomplete index.
+"""
+from datetime import datetime
+
+from models import db, Product
+from suggest_index import SuggestIndex, load_suggest_index, load_new_products
+
+
+def _insert_elsewhere(name: str):
+    """Insert a product without ORM events, like another worker or script would."""
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [{'name': name, 'normalized_name': name.lower(),
+                                                  'created_at': now, 'updated_at': now}])
+
+
+def test_new_products_from_other_processes_are_polled(app):
+    db.session.add(Product(name='Milk', normalized_name='milk'))
+    db.session.commit()
+    index = SuggestIndex()
+    load_suggest_index(index)
+    _insert_elsewhere('Mint Leaves')
+
+    assert [suggestion['name'] for suggestion in index.suggest('mi')] == ['Milk']
+    assert load_new_products(index) == 1
+    assert [suggestion['name'] for suggestion in index.suggest('mi')] == ['Milk', 'Mint Leaves']
+    assert load_new_products(index) == 0
+
+
+def _index(*names: str) -> SuggestIndex:
+    index = SuggestIndex()
+    index.build([(product_id, name, name.lower()) for product_id, name in enumerate(names, 1)])
+    return index
+
+
+def test_fuzzy_suggests_through_typos():
+    index = _index('Amul Paneer', 'Tomato', 'Tomato Ketchup', 'Tata Salt')
+
+    assert [suggestion['name'] for suggestion in index.fuzzy('panner')] == ['Amul Paneer']
+    assert [suggestion['name'] for suggestion in index.fuzzy('tomatoe kech')] == ['Tomato Ketchup']
+    assert index.fuzzy('xyzzy') == []
+
+
+def test_fuzzy_stops_at_the_budget():
+    words = ['milk', 'malk', 'mulk', 'fresh', 'fresk', 'frash', 'gold', 'gild', 'bold']
+    index = _index(*(f'{a} {b} {c}' for a in words for b in words for c in words))
+
+    assert index.fuzzy('mxlk frxsh gxld', budget_ms=0) == []
+    assert len(index.fuzzy('mxlk frxsh gxld', budget_ms=1000)) == 10
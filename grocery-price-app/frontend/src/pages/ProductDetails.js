@@ -97,7 +97,7 @@ const ProductDetails = () => {
           <div className="price-cards">
             {prices.map((price) => (
               <div
-                key={price.id}
+                key={price.id || price.store_name}
                 className={`price-card ${price.price === lowestPrice ? 'best-price' : ''}`}
               >
                 <div className="store-name">{price.store_name}</div>
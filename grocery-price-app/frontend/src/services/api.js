@@ -155,7 +155,8 @@ export const logout = async () => {
 export const getProductSuggestions = async (query) => {
   try {
     const response = await api.get('/products/suggest', {
-      params: { q: query },
+      // Fuzzy mode adds near matches for typos ("panner" -> paneer) after the prefix matches
+      params: { q: query, mode: 'fuzzy' },
     });
     return response.data;
   } catch (error) {